@@ -5,31 +5,399 @@ No Windows-specific fixes needed - works on all platforms.
 """
 
 import asyncio
+import atexit
+import contextlib
+import functools
+import gc
+import hashlib
+import io
+import itertools
+import logging
+import multiprocessing
+import queue
+import sys
 import tempfile
 import os
+import threading
+import weakref
 import zipfile
 import shutil
-from typing import Any, List, Tuple, Optional
-from pathlib import Path
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from types import MappingProxyType, SimpleNamespace
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Dict, Final, FrozenSet, Hashable, IO, Iterator, List, Mapping, Tuple, TypeVar, Optional, Union
 
-from marker.converters.pdf import PdfConverter
-from marker.models import create_model_dict
-from marker.output import text_from_rendered
+# Opt-in torch.compile for the surya models behind Marker. Compiled kernels are
+# cached on disk so restarts skip recompilation. Must be set before marker is imported.
+if os.getenv("MARKER_COMPILE", "").lower() in ("1", "true", "yes"):
+    os.environ.setdefault("COMPILE_ALL", "true")
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.expanduser("~/.cache/marker-inductor"))
 
-# Initialize the converter and models once when the module is loaded.
-CONVERTER: Optional[PdfConverter] = None
+# CUDA caching allocator settings against fragmentation; picked up when torch
+# initialises CUDA, so they must be set before marker is imported. Operators can
+# override them by exporting PYTORCH_CUDA_ALLOC_CONF themselves.
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,garbage_collection_threshold:0.8")
 
-try:
-    models = create_model_dict()
-    CONVERTER = PdfConverter(artifact_dict=models)
-    print("✅ Marker PDF Converter initialized successfully.")
-except Exception as e:
-    print(f"❌ Error initializing Marker PDF Converter: {e}")
-    CONVERTER = None
+if TYPE_CHECKING:
+    from marker.converters.pdf import PdfConverter
+
+@functools.cache
+def load_marker() -> SimpleNamespace:
+    """
+    Import torch and Marker on first use, so importing this module stays cheap.
+    
+    Returns:
+        Namespace with torch, PdfConverter, create_model_dict and text_from_rendered.
+    """
+    import torch
+    from marker.converters.pdf import PdfConverter
+    from marker.models import create_model_dict
+    from marker.output import text_from_rendered
+    return SimpleNamespace(
+        torch=torch,
+        PdfConverter=PdfConverter,
+        create_model_dict=create_model_dict,
+        text_from_rendered=text_from_rendered,
+    )
+
+# Log records are handed to a queue and written by a background listener thread,
+# so conversion workers never block on the output stream. MARKER_LOG_LEVEL sets
+# the level. Logs go to stderr: stdout carries the MCP protocol on STDIO transport.
+logger = logging.getLogger("conversion_service")
+if not logger.handlers:
+    _LOG_QUEUE: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _log_output = logging.StreamHandler(sys.stderr)
+    _log_output.setFormatter(logging.Formatter("%(message)s"))
+    _LOG_LISTENER = QueueListener(_LOG_QUEUE, _log_output)
+    _LOG_LISTENER.start()
+    atexit.register(_LOG_LISTENER.stop)
+    logger.addHandler(QueueHandler(_LOG_QUEUE))
+    logger.setLevel(os.getenv("MARKER_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+
+def _resolve_model_dtype(device: Optional[str]) -> Any:
+    """
+    Resolve the model dtype from MARKER_DTYPE (bf16, fp16 or fp32).
+    
+    Args:
+        device: Device from _resolve_model_device; None means surya picks it
+            (TORCH_DEVICE, otherwise CUDA when available)
+    
+    Returns:
+        A torch dtype, or None to keep Marker's default.
+    """
+    name = os.getenv("MARKER_DTYPE", "").strip().lower()
+    if not name:
+        return None
+    
+    torch = load_marker().torch
+    dtypes = {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": torch.float32}
+    if name not in dtypes:
+        logger.warning("⚠️ Unsupported MARKER_DTYPE '%s', using Marker default", name)
+        return None
+    if name == "bf16":
+        effective_device = device or os.getenv("TORCH_DEVICE") or ("cuda" if torch.cuda.is_available() else "cpu")
+        if effective_device.startswith("cuda") and not torch.cuda.is_bf16_supported():
+            logger.warning("⚠️ BF16 not supported on this GPU, falling back to FP16")
+            return torch.float16
+    return dtypes[name]
+
+def _resolve_model_device() -> Optional[str]:
+    """
+    Resolve the model device from MARKER_DEVICE (cuda, mps or cpu).
+    
+    Returns:
+        A torch device name, or None to let surya choose (TORCH_DEVICE or its
+        own detection).
+    """
+    return os.getenv("MARKER_DEVICE", "").strip().lower() or None
+
+# An NVIDIA device node is a cheap hint that inference will run on a GPU,
+# available without importing torch.
+CUDA_DEVICE_PRESENT: Final[bool] = os.path.exists("/dev/nvidia0")
+
+# Marker is GPU/CPU heavy, so conversions run on a dedicated, bounded pool
+# instead of the default executor used by asyncio.to_thread. On a GPU host the
+# default is a single persistent worker, so every CUDA call comes from the same
+# OS thread and parallel pipelines do not compete for device memory.
+_DEFAULT_WORKERS = 1 if CUDA_DEVICE_PRESENT else min(4, os.cpu_count() or 1)
+MAX_WORKERS: Final[int] = max(1, int(os.getenv("MARKER_WORKERS", str(_DEFAULT_WORKERS))))
+_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="marker")
+# Opt-in process pool for CPU-only hosts, where the GIL rather than VRAM limits
+# throughput. Every worker process loads its own models once. 0 disables.
+PROCESS_WORKERS: Final[int] = max(0, int(os.getenv("MARKER_PROCESS_WORKERS", "0")))
+# Markdown conversions admitted at once; the rest wait on the event loop instead
+# of piling up (with their PDF bytes) in the executor queue. Sized from whichever
+# pool runs the Markdown conversions.
+MAX_PENDING_CONVERSIONS: Final[int] = max(1, int(os.getenv(
+    "MARKER_MAX_PENDING", str(2 * max(MAX_WORKERS, PROCESS_WORKERS))
+)))
+_ADMISSION: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+# Second pipeline stage: text extraction and output file collection for ZIP
+# results, so it overlaps with inference of the next document.
+POSTPROCESS_WORKERS: Final[int] = 2
+_POSTPROCESS_EXECUTOR = ThreadPoolExecutor(max_workers=POSTPROCESS_WORKERS, thread_name_prefix="marker-post")
+
+_T = TypeVar("_T")
+
+async def run_postprocess(func: Callable[..., _T], *args: Any) -> _T:
+    """Run a blocking post-processing step (text extraction, file collection, zipping) on the shared stage pool."""
+    return await asyncio.get_running_loop().run_in_executor(_POSTPROCESS_EXECUTOR, func, *args)
+
+# Models and the default converter are loaded lazily on first use, so importing
+# this module is instant and the load never runs on the event loop.
+models: Optional[Dict[str, Any]] = None
+CONVERTER: Optional["PdfConverter"] = None
+_MODELS_LOCK = threading.Lock()
+
+# Status snapshots are built once and shared read-only across status probes
+_STATUS_READY: Mapping[str, Any] = MappingProxyType(
+    {"initialized": True, "status": "ready", "message": "Converter ready for PDF processing"}
+)
+_STATUS_NOT_LOADED: Mapping[str, Any] = MappingProxyType(
+    {"initialized": False, "status": "not_loaded", "message": "Converter loads on first conversion"}
+)
+_STATUS_FAILED: Optional[Mapping[str, Any]] = None
+
+def load_models(shared_models: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Load the Marker models and default converter once (thread-safe).
+    
+    Args:
+        shared_models: Artifact dict received from the parent process; used
+            instead of loading the models from disk
+    
+    Returns:
+        The shared Marker artifact dict.
+        
+    Raises:
+        RuntimeError: If the models could not be loaded.
+    """
+    global models, CONVERTER, _STATUS_FAILED
+    loaded = models
+    if loaded is not None:
+        return loaded
+    
+    with _MODELS_LOCK:
+        if models is None:
+            try:
+                marker = load_marker()
+                if shared_models is not None:
+                    artifact_dict = shared_models
+                else:
+                    device = _resolve_model_device()
+                    artifact_dict = marker.create_model_dict(device=device, dtype=_resolve_model_dtype(device))
+                CONVERTER = marker.PdfConverter(artifact_dict=artifact_dict)
+                with _CONVERTER_CACHE_LOCK:
+                    _IDLE_CONVERTERS[()] = [CONVERTER]
+                models = artifact_dict
+                _STATUS_FAILED = None
+                logger.info("✅ Marker PDF Converter initialized successfully on %s.", _resolve_model_device() or "default device")
+            except Exception as e:
+                logger.error("❌ Error initializing Marker PDF Converter: %s", e)
+                _STATUS_FAILED = MappingProxyType(
+                    {"initialized": False, "status": "failed", "message": f"Converter initialization failed: {e}"}
+                )
+                raise RuntimeError("Marker PDF Converter is not available. Check initialization logs.") from e
+        return models
+
+async def ensure_models() -> None:
+    """
+    Load the models on the conversion pool if that has not happened yet.
+    
+    Raises:
+        RuntimeError: If the models could not be loaded.
+    """
+    if models is None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_EXECUTOR, load_models)
+
+# Per-conversion output directories live in one process-level arena, preferably
+# on tmpfs so Marker's intermediate files stay in RAM. MARKER_TMPDIR overrides it.
+SHM_DIR: Final[str] = "/dev/shm"
+SHM_MIN_FREE_BYTES: Final[int] = 1 << 30
+# Nameless staging files (memfd / O_TMPFILE) are handed to Marker via /proc/self/fd
+PROC_FD_AVAILABLE: Final[bool] = os.path.isdir("/proc/self/fd")
+_ARENA_LOCK = threading.Lock()
+_ARENA: Optional[str] = None
+
+def _arena_parent() -> Optional[str]:
+    """Pick the parent directory for the temp arena (None means the system default)."""
+    configured = os.getenv("MARKER_TMPDIR")
+    if configured:
+        return configured
+    try:
+        if (os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK | os.X_OK)
+                and shutil.disk_usage(SHM_DIR).free >= SHM_MIN_FREE_BYTES):
+            return SHM_DIR
+    except OSError:
+        pass
+    return None
+
+def get_temp_arena() -> str:
+    """
+    Return the process-level temp arena, creating it on first use.
+    
+    The arena is removed when the process exits.
+    """
+    global _ARENA
+    with _ARENA_LOCK:
+        if _ARENA is None or not os.path.isdir(_ARENA):
+            _ARENA = tempfile.mkdtemp(prefix="marker_arena_", dir=_arena_parent())
+            atexit.register(shutil.rmtree, _ARENA, ignore_errors=True)
+        return _ARENA
+
+# Process-wide cap on Marker pipelines running at once, shared by every pool
+# (including the ZIP service's), so their model working sets never stack up.
+MAX_CONCURRENCY: Final[int] = max(1, int(os.getenv("MARKER_MAX_CONCURRENCY", str(MAX_WORKERS))))
+_PIPELINE_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+def run_converter(converter: "PdfConverter", source: Union[str, io.BytesIO]) -> Any:
+    """Run a converter with autograd disabled so no graph state is tracked."""
+    with _PIPELINE_SLOTS, load_marker().torch.inference_mode():
+        return converter(source)
+
+def rendered_text(rendered_document: Any) -> str:
+    """
+    Return the text of a rendered document.
+    
+    Markdown output carries its text directly; only other output formats go
+    through text_from_rendered, which also extracts images that are not used here.
+    """
+    markdown = getattr(rendered_document, "markdown", None)
+    if isinstance(markdown, str):
+        return markdown
+    text, _, _ = load_marker().text_from_rendered(rendered_document)
+    return str(text)
+
+# Every MARKER_GC_INTERVAL conversions, cyclic garbage left behind by Marker is
+# collected and the CUDA caching allocator trimmed, so long-running servers do
+# not fragment. 0 disables. The same cleanup runs right away whenever reserved
+# CUDA memory exceeds MARKER_CUDA_WATERMARK (fraction of device memory).
+GC_INTERVAL: Final[int] = max(0, int(os.getenv("MARKER_GC_INTERVAL", "16")))
+CUDA_WATERMARK: Final[float] = float(os.getenv("MARKER_CUDA_WATERMARK", "0.8"))
+_CONVERSION_COUNTER = itertools.count(1)
+
+@functools.cache
+def _cuda_watermark_bytes() -> int:
+    """Reserved CUDA memory (in bytes) above which memory is released after a conversion."""
+    torch = load_marker().torch
+    return int(torch.cuda.get_device_properties(torch.cuda.current_device()).total_memory * CUDA_WATERMARK)
+
+def post_convert_cleanup() -> None:
+    """Count a finished conversion and release memory held by Marker when due."""
+    periodic = GC_INTERVAL > 0 and next(_CONVERSION_COUNTER) % GC_INTERVAL == 0
+    torch = load_marker().torch
+    cuda = torch.cuda.is_available()
+    if not periodic and not (cuda and torch.cuda.memory_reserved() > _cuda_watermark_bytes()):
+        return
+    gc.collect()
+    if cuda:
+        torch.cuda.empty_cache()
+
+# Idle converters per frozen settings key. Marker processors keep per-document
+# state on self, so a converter is lent to one conversion at a time and handed
+# back afterwards; the least recently used settings are dropped beyond the limit.
+CONVERTER_CACHE_SIZE: Final[int] = 8
+_IDLE_CONVERTERS: "OrderedDict[Hashable, List[PdfConverter]]" = OrderedDict()
+_CONVERTER_CACHE_LOCK = threading.Lock()
+
+# Settings whose value equals Marker's own default; they are left out of cache
+# keys so e.g. {"output_format": "markdown"} shares the default converter.
+MARKER_DEFAULTS: Final[Mapping[str, Any]] = MappingProxyType({
+    "output_format": "markdown",
+    "use_llm": False,
+    "force_ocr": False,
+    "strip_existing_ocr": False,
+    "paginate_output": False,
+    "debug": False,
+})
+
+def _settings_key(settings: dict) -> Tuple[Tuple[str, Hashable], ...]:
+    """Freeze settings into a hashable cache key; unhashable values are keyed by their repr."""
+    items = []
+    for key, value in settings.items():
+        if value is None or MARKER_DEFAULTS.get(key) == value:
+            continue
+        if isinstance(value, list):
+            value = tuple(value)
+        try:
+            hash(value)
+        except TypeError:
+            value = ("<repr>", repr(value))
+        items.append((key, value))
+    return tuple(sorted(items))
+
+@contextlib.contextmanager
+def lend_converter(key: Optional[Hashable], factory: Callable[[], "PdfConverter"]) -> Iterator["PdfConverter"]:
+    """
+    Lend an idle converter for key to the calling thread, building one if none is idle.
+    
+    Args:
+        key: Pool key, or None for a one-off converter that is not kept
+        factory: Builds a new converter for this key
+        
+    Yields:
+        A converter that no other conversion uses until it is returned
+    """
+    converter = None
+    if key is not None:
+        with _CONVERTER_CACHE_LOCK:
+            idle = _IDLE_CONVERTERS.get(key)
+            if idle:
+                converter = idle.pop()
+    if converter is None:
+        converter = factory()
+    reusable = key is not None
+    try:
+        yield converter
+    except BaseException:
+        # A failed conversion can leave per-document state behind; that
+        # instance is not handed to the next conversion
+        reusable = False
+        raise
+    finally:
+        if reusable:
+            with _CONVERTER_CACHE_LOCK:
+                # No more instances are kept than pipelines can run at once;
+                # a surplus one is dropped here and freed by refcounting.
+                idle = _IDLE_CONVERTERS.setdefault(key, [])
+                if len(idle) < MAX_CONCURRENCY:
+                    idle.append(converter)
+                _IDLE_CONVERTERS.move_to_end(key)
+                while len(_IDLE_CONVERTERS) > CONVERTER_CACHE_SIZE:
+                    del _IDLE_CONVERTERS[next(iter(_IDLE_CONVERTERS))]
+        del converter
+
+def checkout_converter(settings: Optional[dict] = None) -> ContextManager["PdfConverter"]:
+    """
+    Lend a converter for the given settings, reusing idle instances.
+    
+    Args:
+        settings: Optional conversion settings
+        
+    Returns:
+        A context manager yielding a converter for exclusive use; the default
+        converter when no settings are given.
+    """
+    artifact_dict = load_models()
+    if not settings:
+        return lend_converter((), lambda: load_marker().PdfConverter(artifact_dict=artifact_dict))
+    config = {k: v for k, v in settings.items() if v is not None}
+    return lend_converter(
+        _settings_key(settings),
+        lambda: load_marker().PdfConverter(artifact_dict=artifact_dict, config=config),
+    )
 
 class ConversionResult:
     """Result of a PDF conversion with all generated files."""
     
+    __slots__ = (
+        'pdf_name', 'markdown_content', 'html_content', 'json_content',
+        'output_files', 'debug_files', 'image_files', 'success', 'error', 'output_dir',
+    )
+    
     def __init__(self, pdf_name: str):
         self.pdf_name = pdf_name
         self.markdown_content = ""
@@ -42,51 +410,346 @@ class ConversionResult:
         self.error: str = ""
         self.output_dir: Optional[str] = None
 
-async def convert_pdf_to_markdown(pdf_path: str, settings: Optional[dict] = None) -> str:
+# Markdown results keyed by (PDF content digest, frozen settings), so re-uploads of
+# the same document with the same settings skip conversion. 0 disables the cache.
+# With MARKER_RESULT_CACHE_DIR set, results are also persisted there across restarts.
+RESULT_CACHE_SIZE: Final[int] = max(0, int(os.getenv("MARKER_RESULT_CACHE_SIZE", "128")))
+RESULT_CACHE_DIR: Final[Optional[str]] = os.getenv("MARKER_RESULT_CACHE_DIR") or None
+_RESULT_CACHE: "OrderedDict[Tuple[str, Tuple[Tuple[str, Hashable], ...]], str]" = OrderedDict()
+_RESULT_CACHE_LOCK = threading.Lock()
+
+def _pdf_digest(source: Union[str, bytes]) -> str:
+    """Hash the PDF content of a file path or in-memory PDF."""
+    if isinstance(source, bytes):
+        return hashlib.blake2b(source, digest_size=16).hexdigest()
+    with open(source, 'rb') as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+def _result_cache_key(source: Union[str, bytes], settings: dict) -> Optional[Tuple[str, Tuple[Tuple[str, Hashable], ...]]]:
+    """Build the result cache key, or None if caching is disabled."""
+    if RESULT_CACHE_SIZE == 0 and RESULT_CACHE_DIR is None:
+        return None
+    return _pdf_digest(source), _settings_key(settings)
+
+def _result_cache_path(key: Tuple[str, Tuple[Tuple[str, Hashable], ...]]) -> Optional[str]:
+    """Path of the persisted result for a cache key, or None without a cache dir."""
+    if RESULT_CACHE_DIR is None:
+        return None
+    settings_digest = hashlib.blake2b(repr(key[1]).encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(RESULT_CACHE_DIR, f"{key[0]}-{settings_digest}.md")
+
+def _remember_result(key: Tuple[str, Tuple[Tuple[str, Hashable], ...]], markdown_text: str) -> None:
+    """Insert into the in-memory LRU, evicting the least recently used entries."""
+    if RESULT_CACHE_SIZE == 0:
+        return
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE[key] = markdown_text
+        _RESULT_CACHE.move_to_end(key)
+        while len(_RESULT_CACHE) > RESULT_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+
+def _result_cache_get(key: Tuple[str, Tuple[Tuple[str, Hashable], ...]]) -> Optional[str]:
+    """Return a cached Markdown result from memory or, failing that, from disk."""
+    with _RESULT_CACHE_LOCK:
+        markdown_text = _RESULT_CACHE.get(key)
+        if markdown_text is not None:
+            _RESULT_CACHE.move_to_end(key)
+            return markdown_text
+    
+    cache_path = _result_cache_path(key)
+    if cache_path is None:
+        return None
+    try:
+        # Stored as raw UTF-8 bytes, so a cache hit returns the text exactly as
+        # converted and is decoded in one pass instead of through the text IO layer
+        with open(cache_path, "rb") as f:
+            markdown_text = f.read().decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+    _remember_result(key, markdown_text)
+    return markdown_text
+
+def _result_cache_put(key: Tuple[str, Tuple[Tuple[str, Hashable], ...]], markdown_text: str) -> None:
+    """Store a Markdown result in memory and, if configured, on disk."""
+    _remember_result(key, markdown_text)
+    
+    cache_path = _result_cache_path(key)
+    if cache_path is None:
+        return
+    try:
+        cache_dir, cache_name = os.path.split(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        # A unique partial file per writer: threads and other processes sharing
+        # the cache dir (MCP server, Gradio app, process workers) never interleave
+        fd, partial_path = tempfile.mkstemp(prefix=f"{cache_name}.", suffix=".tmp", dir=cache_dir)
+        try:
+            # One encode and one write (large writes bypass the buffer) instead of chunked text IO
+            with open(fd, "wb") as f:
+                f.write(markdown_text.encode("utf-8"))
+            os.replace(partial_path, cache_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(partial_path)
+            raise
+    except OSError as e:
+        logger.warning("⚠️ Could not persist cached result %s: %s", cache_path, e)
+
+def _anonymous_pdf_fd() -> Optional[int]:
     """
-    Convert a PDF file to Markdown string.
+    Open a nameless file to stage a PDF in, if the platform supports it.
     
-    Args:
-        pdf_path: Path to the PDF file
-        settings: Optional conversion settings
-        
     Returns:
-        Converted Markdown text
+        A memfd when there is no tmpfs arena, an O_TMPFILE file in the arena
+        otherwise, or None to fall back to a named temp file.
+    """
+    if not PROC_FD_AVAILABLE:
+        return None
+    if hasattr(os, "memfd_create") and _arena_parent() is None:
+        return os.memfd_create("marker_pdf")
+    if hasattr(os, "O_TMPFILE"):
+        try:
+            return os.open(get_temp_arena(), os.O_TMPFILE | os.O_RDWR, 0o600)
+        except OSError:
+            pass
+    return None
+
+@contextlib.contextmanager
+def _staged_pdf(source: Union[str, bytes], shareable: bool = False) -> Iterator[str]:
     """
-    if CONVERTER is None:
-        raise RuntimeError("Marker PDF Converter is not available. Check initialization logs.")
+    Yield a filesystem path for the PDF.
+    
+    Marker would spill in-memory input to the default temp dir itself; staging it
+    in the temp arena instead keeps it on tmpfs when available, and in an
+    anonymous memfd on Linux when it is not. On Linux the staged file has no
+    name, so there is nothing to unlink afterwards. A shareable path is one other
+    processes can open too, so it is always a named file.
+    """
+    if isinstance(source, str):
+        yield source
+        return
+    fd = None if shareable else _anonymous_pdf_fd()
+    if fd is not None:
+        # The file has no directory entry and disappears with the descriptor
+        try:
+            view = memoryview(source)
+            while view:
+                view = view[os.write(fd, view):]
+            yield f"/proc/self/fd/{fd}"
+        finally:
+            os.close(fd)
+        return
+    with tempfile.NamedTemporaryFile(suffix=".pdf", dir=get_temp_arena(), delete_on_close=False) as staged:
+        staged.write(source)
+        staged.close()
+        yield staged.name
+
+def prefetch_pdf(pdf_path: str) -> None:
+    """Ask the kernel to start reading a PDF into the page cache (best effort)."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(pdf_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def schedule_prefetch(pdf_path: str) -> None:
+    """Warm the page cache for a queued PDF while it waits for a worker."""
+    asyncio.get_running_loop().run_in_executor(None, prefetch_pdf, pdf_path)
+
+# With MARKER_SHARE_MODELS the parent loads the models once and hands the workers
+# its weights in shared memory, instead of every worker reading them from disk.
+SHARE_MODELS: Final[bool] = os.getenv("MARKER_SHARE_MODELS", "").lower() in ("1", "true", "yes")
+_PROCESS_EXECUTOR: Optional[ProcessPoolExecutor] = None
+_PROCESS_EXECUTOR_LOCK = threading.Lock()
+
+def _shared_models() -> Dict[str, Any]:
+    """Load the models in this process and move their weights into shared memory."""
+    artifact_dict = load_models()
+    for predictor in artifact_dict.values():
+        # Marker's artifacts are surya predictors wrapping a torch module
+        module = getattr(predictor, "model", predictor)
+        if hasattr(module, "share_memory"):
+            module.share_memory()
+    return artifact_dict
+
+# Thread pool sizes of the BLAS/OpenMP runtimes behind torch and numpy
+BLAS_THREAD_VARS: Final[Tuple[str, ...]] = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+def _limit_worker_threads() -> None:
+    """
+    Split the CPUs between the worker processes.
+    
+    Workers inherit the parent's environment; without a limit every one of them
+    would size its thread pools to all CPUs. Values the operator set are kept.
+    """
+    threads = str(max(1, (os.cpu_count() or 1) // PROCESS_WORKERS))
+    for name in BLAS_THREAD_VARS:
+        os.environ.setdefault(name, threads)
+    # Unpickling shared models already imported torch, so its pool is set directly
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(int(os.environ["OMP_NUM_THREADS"]))
+
+def _init_process_worker(shared_models: Optional[Dict[str, Any]] = None) -> None:
+    """Load (or adopt the shared) models when a worker process starts instead of on its first PDF."""
+    _limit_worker_threads()
+    try:
+        load_models(shared_models)
+    except RuntimeError:
+        # The conversion itself reports the failure
+        pass
+
+def _process_executor() -> ProcessPoolExecutor:
+    """Return the conversion process pool, starting it on first use."""
+    global _PROCESS_EXECUTOR
+    with _PROCESS_EXECUTOR_LOCK:
+        if _PROCESS_EXECUTOR is None:
+            if SHARE_MODELS:
+                # torch's multiprocessing context pickles tensors as shared memory handles
+                mp_context = load_marker().torch.multiprocessing.get_context("spawn")
+                initargs: Tuple[Any, ...] = (_shared_models(),)
+            else:
+                mp_context = multiprocessing.get_context("spawn")
+                initargs = ()
+            _PROCESS_EXECUTOR = ProcessPoolExecutor(
+                max_workers=PROCESS_WORKERS,
+                mp_context=mp_context,
+                initializer=_init_process_worker,
+                initargs=initargs,
+            )
+        return _PROCESS_EXECUTOR
+
+def start_process_workers() -> None:
+    """
+    Spawn all conversion worker processes ahead of the first request.
+    
+    ProcessPoolExecutor only starts a process when work arrives, so without this
+    the first requests pay for interpreter start-up and model loading. Does
+    nothing when the process pool is disabled.
+    """
+    if not PROCESS_WORKERS:
+        return
+    executor = _process_executor()
+    # Each pending no-op task makes the pool start one more process, whose
+    # initializer then loads the models
+    for _ in range(PROCESS_WORKERS):
+        executor.submit(os.getpid)
+    logger.info("🚀 Starting %d conversion worker processes", PROCESS_WORKERS)
+
+def _convert_path(pdf_path: str, settings: dict) -> str:
+    """Convert a PDF file to Markdown with a borrowed converter (in a worker thread or process)."""
+    with checkout_converter(settings) as converter:
+        rendered_document = run_converter(converter, pdf_path)
+    markdown_text = rendered_text(rendered_document)
+    del rendered_document
+    post_convert_cleanup()
+    return markdown_text
+
+def _admission_semaphore() -> asyncio.Semaphore:
+    """Return the admission semaphore for the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _ADMISSION.get(loop)
+    if semaphore is None:
+        semaphore = _ADMISSION[loop] = asyncio.Semaphore(MAX_PENDING_CONVERSIONS)
+    return semaphore
+
+async def _convert_to_markdown(source: Union[str, bytes], label: str, settings: Optional[dict]) -> str:
+    """Run a Markdown conversion for a file path or in-memory PDF on the conversion pool."""
+    # With a process pool the models live in the worker processes only
+    if not PROCESS_WORKERS:
+        await ensure_models()
     
     # Set default settings if None
     if settings is None:
         settings = {}
     
+    def cached_result() -> Tuple[Optional[Tuple[str, Tuple[Tuple[str, Hashable], ...]]], Optional[str]]:
+        """Hash the PDF and look it up in the result cache."""
+        cache_key = _result_cache_key(source, settings)
+        if cache_key is None:
+            return None, None
+        cached = _result_cache_get(cache_key)
+        if cached is not None:
+            logger.info("♻️ Reusing cached conversion for: %s", label)
+        return cache_key, cached
+    
     def blocking_conversion() -> str:
         """Synchronous wrapper for the marker conversion call."""
         try:
-            # Create converter with settings if provided
-            if settings:
-                converter = PdfConverter(artifact_dict=models, config=settings)
-            else:
-                converter = CONVERTER
+            # Identical content with identical settings was already converted
+            cache_key, cached = cached_result()
+            if cached is not None:
+                return cached
+            
+            # In-memory input is staged inside this worker thread
+            with _staged_pdf(source) as pdf_path:
+                markdown_text = _convert_path(pdf_path, settings)
             
-            # Convert PDF
-            rendered_document = converter(pdf_path)
-            text, _, _ = text_from_rendered(rendered_document)
-            return str(text)
+            if cache_key is not None:
+                _result_cache_put(cache_key, markdown_text)
+            return markdown_text
             
         except Exception as e:
-            print(f"Error in blocking conversion: {e}")
+            logger.error("Error in blocking conversion: %s", e)
             raise
     
+    async def process_conversion() -> str:
+        """Convert in a worker process; pool threads only hash, stage and cache."""
+        loop = asyncio.get_running_loop()
+        cache_key, cached = await loop.run_in_executor(_EXECUTOR, cached_result)
+        if cached is not None:
+            return cached
+        
+        with contextlib.ExitStack() as staging:
+            pdf_path = await loop.run_in_executor(
+                _EXECUTOR, staging.enter_context, _staged_pdf(source, shareable=True)
+            )
+            # Awaiting the job instead of blocking on it keeps the thread pool
+            # free, so MARKER_WORKERS does not cap the busy worker processes
+            markdown_text = await asyncio.wrap_future(
+                _process_executor().submit(_convert_path, pdf_path, settings)
+            )
+        
+        if cache_key is not None:
+            await loop.run_in_executor(_EXECUTOR, _result_cache_put, cache_key, markdown_text)
+        return markdown_text
+    
+    if isinstance(source, str):
+        schedule_prefetch(source)
+    
     try:
-        print(f"🔄 Converting PDF: {os.path.basename(pdf_path)}")
-        markdown_text = await asyncio.to_thread(blocking_conversion)
-        print("✅ PDF conversion completed successfully")
+        async with _admission_semaphore():
+            logger.info("🔄 Converting PDF: %s", label)
+            if PROCESS_WORKERS:
+                markdown_text = await process_conversion()
+            else:
+                loop = asyncio.get_running_loop()
+                markdown_text = await loop.run_in_executor(_EXECUTOR, blocking_conversion)
+        logger.info("✅ PDF conversion completed successfully")
         return markdown_text
     except Exception as e:
-        print(f"❌ PDF conversion failed: {e}")
+        logger.error("❌ PDF conversion failed: %s", e)
         raise
 
+async def convert_pdf_to_markdown(pdf_path: str, settings: Optional[dict] = None) -> str:
+    """
+    Convert a PDF file to Markdown string.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        settings: Optional conversion settings
+        
+    Returns:
+        Converted Markdown text
+    """
+    return await _convert_to_markdown(pdf_path, os.path.basename(pdf_path), settings)
+
 async def convert_pdf_bytes_to_markdown(pdf_bytes: bytes, settings: Optional[dict] = None) -> str:
     """
     Convert PDF bytes to Markdown string.
@@ -98,21 +761,46 @@ async def convert_pdf_bytes_to_markdown(pdf_bytes: bytes, settings: Optional[dic
     Returns:
         Converted Markdown text
     """
-    # Use a temporary file to handle the byte stream
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-        temp_pdf.write(pdf_bytes)
-        temp_pdf_path = temp_pdf.name
+    # The bytes are hashed and staged as-is (on tmpfs when available) by the
+    # worker thread; wrapping them in a BytesIO would cost a full copy.
+    return await _convert_to_markdown(bytes(pdf_bytes), f"<{len(pdf_bytes)} bytes>", settings)
 
-    try:
-        # Convert the temporary file
-        markdown_result = await convert_pdf_to_markdown(temp_pdf_path, settings)
-        return markdown_result
-    finally:
-        # Clean up temporary file
-        try:
-            os.unlink(temp_pdf_path)
-        except OSError:
-            pass
+# Longest part (in UTF-8 bytes) of a PDF name embedded in an output directory
+# name; the full name can approach the 255-byte file name limit on its own.
+OUTPUT_DIR_NAME_BYTES: Final[int] = 64
+
+def make_output_dir(pdf_name: str) -> str:
+    """
+    Create a fresh output directory for one conversion in the temp arena.
+    
+    The PDF name only serves as a readable hint in the directory name; it is
+    truncated, so arbitrarily long uploaded names cannot make mkdtemp fail.
+    """
+    # Cut on the encoded name: multibyte characters (CJK, emoji) count per byte
+    stem = os.path.splitext(pdf_name)[0].encode("utf-8")[:OUTPUT_DIR_NAME_BYTES].decode("utf-8", "ignore")
+    return tempfile.mkdtemp(prefix=f"marker_output_{stem}_", dir=get_temp_arena())
+
+# Settings that hold a path; boolean values for them are ignored
+PATH_SETTINGS: Final[FrozenSet[str]] = frozenset({"debug_data_folder"})
+# Per-conversion paths are left out of converter pool keys; converters that
+# write debug output are never pooled since their debug folder is per conversion.
+PER_CONVERSION_KEYS: Final[FrozenSet[str]] = frozenset({"output_dir", "debug_data_folder"})
+DEBUG_KEYS: Final[Tuple[str, ...]] = ("debug", "debug_layout_images", "debug_pdf_images", "debug_json")
+
+def output_converter_key(config: dict) -> Optional[Hashable]:
+    """
+    Pool key for a converter config that carries per-conversion output paths.
+    
+    Args:
+        config: Full Marker config for one conversion
+        
+    Returns:
+        A key shared by configs that only differ in their output paths, or None
+        if the converter must not be reused.
+    """
+    if any(config.get(key) for key in DEBUG_KEYS):
+        return None
+    return "output", _settings_key({k: v for k, v in config.items() if k not in PER_CONVERSION_KEYS})
 
 async def convert_pdf_with_zip_output(pdf_path: str, settings: dict) -> ConversionResult:
     """
@@ -125,151 +813,242 @@ async def convert_pdf_with_zip_output(pdf_path: str, settings: dict) -> Conversi
     Returns:
         ConversionResult object with all generated files
     """
-    if CONVERTER is None:
-        raise RuntimeError("Marker PDF Converter is not available. Check initialization logs.")
+    await ensure_models()
 
     result = ConversionResult(os.path.basename(pdf_path))
     
-    def blocking_conversion() -> ConversionResult:
-        """Synchronous wrapper for marker conversion with full output collection."""
-        try:
-            # Create temporary output directory for this conversion
-            temp_output_dir = tempfile.mkdtemp(prefix=f"marker_output_{os.path.splitext(result.pdf_name)[0]}_")
-            result.output_dir = temp_output_dir
-            
-            # Filter None values from settings
-            filtered_settings = {k: v for k, v in settings.items() if v is not None}
-            
-            # Create config dict with output directory
-            direct_config: dict[str, Any] = {
-                "output_dir": temp_output_dir,
-                "debug_data_folder": os.path.join(temp_output_dir, "debug_data"),
-            }
-            
-            # Add all settings to config, but protect debug_data_folder from boolean values
-            for key, value in filtered_settings.items():
-                if key == "debug_data_folder" and isinstance(value, bool):
-                    # Skip boolean debug_data_folder values - use the correct path instead
-                    continue
-                direct_config[key] = value
-            
-            print(f"🔍 Converting {result.pdf_name} with output directory: {temp_output_dir}")
-            
-            # Create converter with settings
-            converter = PdfConverter(
-                config=direct_config,
-                artifact_dict=models
-            )
-            
-            # Perform conversion
-            rendered_document = converter(pdf_path)
-            text, _, _ = text_from_rendered(rendered_document)
-            
-            # Save main text
-            result.markdown_content = str(text)
-            
-            # Collect all generated files
-            result.output_files = collect_output_files(temp_output_dir)
-            result.debug_files = collect_debug_files(temp_output_dir)
-            result.image_files = collect_image_files(temp_output_dir)
-            
-            result.success = True
-            print(f"✅ Successfully converted {result.pdf_name} with {len(result.output_files)} output files")
-            
-            return result
-            
-        except Exception as e:
-            print(f"❌ Failed to convert {result.pdf_name}: {e}")
-            result.error = str(e)
-            result.success = False
-            return result
+    def blocking_conversion() -> Tuple[Any, str]:
+        """Inference stage: run the Marker pipeline and return the rendered document."""
+        # Create temporary output directory for this conversion
+        temp_output_dir = make_output_dir(result.pdf_name)
+        result.output_dir = temp_output_dir
+        
+        # Create config dict with output directory plus all non-None settings.
+        # Path settings given as booleans are skipped so the correct path is kept.
+        direct_config: dict[str, Any] = {
+            "output_dir": temp_output_dir,
+            "debug_data_folder": os.path.join(temp_output_dir, "debug_data"),
+            **{
+                key: value for key, value in settings.items()
+                if value is not None and not (key in PATH_SETTINGS and isinstance(value, bool))
+            },
+        }
+        
+        logger.debug("🔍 Converting %s with output directory: %s", result.pdf_name, temp_output_dir)
+        
+        # Borrow a converter built for the same settings, or create one
+        artifact_dict = load_models()
+        factory = lambda: load_marker().PdfConverter(config=direct_config, artifact_dict=artifact_dict)
+        with lend_converter(output_converter_key(direct_config), factory) as converter:
+            return run_converter(converter, pdf_path), temp_output_dir
     
-    try:
-        # Run the blocking function in a separate thread
-        result = await asyncio.to_thread(blocking_conversion)
+    def blocking_postprocess(rendered_document: Any, temp_output_dir: str) -> ConversionResult:
+        """Post-processing stage: extract the text and collect all generated files."""
+        # Save main text
+        result.markdown_content = rendered_text(rendered_document)
+        del rendered_document
+        post_convert_cleanup()
+        
+        # Collect all generated files
+        result.output_files, result.debug_files, result.image_files = collect_all_files(temp_output_dir)
+        
+        result.success = True
+        logger.info("✅ Successfully converted %s with %d output files", result.pdf_name, len(result.output_files))
+        
         return result
+    
+    try:
+        # Inference runs on the conversion pool; post-processing is handed to a
+        # separate stage so the worker is free for the next PDF right away.
+        loop = asyncio.get_running_loop()
+        rendered_document, temp_output_dir = await loop.run_in_executor(_EXECUTOR, blocking_conversion)
+        return await run_postprocess(blocking_postprocess, rendered_document, temp_output_dir)
     except Exception as e:
-        print(f"❌ Error during PDF conversion: {e}")
+        logger.error("❌ Failed to convert %s: %s", result.pdf_name, e)
         result.error = str(e)
         result.success = False
         return result
 
-def collect_output_files(output_dir: str) -> List[str]:
-    """Collect all output files from the output directory."""
-    files: List[str] = []
-    if not os.path.exists(output_dir):
-        return files
-    
-    for root, dirs, filenames in os.walk(output_dir):
-        for filename in filenames:
-            file_path = os.path.join(root, filename)
-            # Skip temporary files
-            if not filename.startswith('.') and not filename.endswith('.tmp'):
-                files.append(file_path)
-    
-    return files
+# Subdirectories of the output directory that hold debug output
+DEBUG_DIRS: Final[FrozenSet[str]] = frozenset({'debug_data', 'debug_images', 'layout_images', 'pdf_images'})
+IMAGE_EXTENSIONS: Final[FrozenSet[str]] = frozenset({'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'})
 
-def collect_debug_files(output_dir: str) -> List[str]:
-    """Collect debug files (images, JSON, etc.)."""
-    debug_files: List[str] = []
-    if not os.path.exists(output_dir):
-        return debug_files
-    
-    # Look for debug directories within the output directory
-    debug_dirs = ['debug_data', 'debug_images', 'layout_images', 'pdf_images']
+def _extension(name: str) -> str:
+    """Return the lowercase extension without the dot ('' if there is none)."""
+    _, dot, ext = name.rpartition('.')
+    return ext.lower() if dot else ''
+
+def _scan_files(root: str) -> Iterator[Tuple[str, str, bool]]:
+    """Yield (path, name, in_debug_dir) for every file below root using os.scandir."""
+    stack = [(root, False)]
+    while stack:
+        path, in_debug = stack.pop()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, in_debug or (path == root and entry.name in DEBUG_DIRS)))
+                    else:
+                        yield entry.path, entry.name, in_debug
+        except OSError:
+            continue
+
+def collect_all_files(output_dir: str) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Collect output, debug and image files in a single pass over the output directory.
     
-    for debug_dir in debug_dirs:
-        debug_path = os.path.join(output_dir, debug_dir)
-        if os.path.exists(debug_path):
-            for root, dirs, filenames in os.walk(debug_path):
-                for filename in filenames:
-                    file_path = os.path.join(root, filename)
-                    debug_files.append(file_path)
+    Args:
+        output_dir: Directory to scan
+        
+    Returns:
+        Tuple of (output_files, debug_files, image_files)
+    """
+    output_files: List[str] = []
+    debug_files: List[str] = []
+    image_files: List[str] = []
+    # A missing directory simply yields nothing: _scan_files skips paths it
+    # cannot open, so no separate isdir() stat is needed
+    for file_path, filename, in_debug_dir in _scan_files(output_dir):
+        # Skip temporary files
+        if not filename.startswith('.') and not filename.endswith('.tmp'):
+            output_files.append(file_path)
+        if in_debug_dir:
+            debug_files.append(file_path)
+        if _extension(filename) in IMAGE_EXTENSIONS:
+            image_files.append(file_path)
     
     # Also search in current directory for backward compatibility
     current_debug_path = os.path.join(os.getcwd(), 'debug_data')
-    if os.path.exists(current_debug_path):
-        for root, dirs, filenames in os.walk(current_debug_path):
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
-                debug_files.append(file_path)
+    debug_files.extend(file_path for file_path, _, _ in _scan_files(current_debug_path))
     
-    return debug_files
+    return output_files, debug_files, image_files
+
+def collect_output_files(output_dir: str) -> List[str]:
+    """Collect all output files from the output directory."""
+    return collect_all_files(output_dir)[0]
+
+def collect_debug_files(output_dir: str) -> List[str]:
+    """Collect debug files (images, JSON, etc.)."""
+    return collect_all_files(output_dir)[1]
 
 def collect_image_files(output_dir: str) -> List[str]:
     """Collect extracted images."""
-    image_files: List[str] = []
-    if not os.path.exists(output_dir):
-        return image_files
-    
-    image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp']
-    
-    for root, dirs, filenames in os.walk(output_dir):
-        for filename in filenames:
-            if any(filename.lower().endswith(ext) for ext in image_extensions):
-                file_path = os.path.join(root, filename)
-                image_files.append(file_path)
+    return collect_all_files(output_dir)[2]
+
+# Formats that are already compressed; deflating them again only costs CPU
+STORED_EXTENSIONS: Final[FrozenSet[str]] = frozenset({'png', 'jpg', 'jpeg', 'gif', 'webp', 'pdf', 'zip'})
+# Fast deflate level for text entries (markdown, HTML, JSON)
+ZIP_COMPRESSLEVEL: Final[int] = 1
+# Texts larger than this (in characters) are encoded and streamed in chunks
+LARGE_TEXT_CHUNK: Final[int] = 1 << 20
+# Write buffer for the zip output file
+ZIP_WRITE_BUFFER: Final[int] = 1 << 20
+# Result zips are handed out by path and may be served straight from their
+# directory (see get_zip_dir), so only the most recent MARKER_ZIP_KEEP are kept
+ZIP_KEEP: Final[int] = max(1, int(os.getenv("MARKER_ZIP_KEEP", "32")))
+_ZIP_LOCK = threading.Lock()
+_ZIP_DIR: Optional[str] = None
+_RECENT_ZIPS: "deque[str]" = deque()
+
+def get_zip_dir() -> str:
+    """
+    Return the process-level directory for result zips, creating it on first use.
     
-    return image_files
+    The directory is removed when the process exits.
+    """
+    global _ZIP_DIR
+    with _ZIP_LOCK:
+        if _ZIP_DIR is None or not os.path.isdir(_ZIP_DIR):
+            _ZIP_DIR = tempfile.mkdtemp(prefix="marker_zips_")
+            atexit.register(shutil.rmtree, _ZIP_DIR, ignore_errors=True)
+        return _ZIP_DIR
+
+def _retain_zip(zip_path: str) -> None:
+    """Track a new result zip and delete the oldest ones beyond ZIP_KEEP."""
+    with _ZIP_LOCK:
+        _RECENT_ZIPS.append(zip_path)
+        evicted = [_RECENT_ZIPS.popleft() for _ in range(len(_RECENT_ZIPS) - ZIP_KEEP)]
+    for path in evicted:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+# Finished batches keyed by (file name + content digest per PDF, frozen settings,
+# zip options), so converting the same upload again returns the zip that is still
+# on disk. Follows MARKER_RESULT_CACHE_SIZE for on/off; at most ZIP_KEEP entries.
+_BatchKey = Tuple[Tuple[Tuple[str, str], ...], Tuple[Tuple[str, Hashable], ...], bool, bool]
+_BATCH_CACHE: "OrderedDict[_BatchKey, Tuple[str, str]]" = OrderedDict()
+
+def _batch_cache_key(file_paths: List[str], settings: dict,
+                     include_debug: bool, include_images: bool) -> Optional[_BatchKey]:
+    """Build the batch cache key (hashes every PDF), or None if caching is disabled."""
+    if RESULT_CACHE_SIZE == 0:
+        return None
+    try:
+        files = tuple((os.path.basename(path), _pdf_digest(path)) for path in file_paths)
+    except OSError:
+        # Unreadable uploads are reported per file by the conversion itself
+        return None
+    return files, _settings_key(settings), include_debug, include_images
 
-def create_zip_from_results(results: List[ConversionResult], include_debug: bool = True, include_images: bool = True) -> str:
+def _batch_cache_get(key: _BatchKey) -> Optional[Tuple[str, str]]:
+    """Return the cached (zip_path, combined_content) if its zip is still kept on disk."""
+    with _ZIP_LOCK:
+        cached = _BATCH_CACHE.get(key)
+        if cached is None:
+            return None
+        if cached[0] not in _RECENT_ZIPS:
+            del _BATCH_CACHE[key]
+            return None
+        # Keep the reused zip away from eviction as if it were just written
+        _RECENT_ZIPS.remove(cached[0])
+        _RECENT_ZIPS.append(cached[0])
+        _BATCH_CACHE.move_to_end(key)
+        return cached
+
+def _batch_cache_put(key: _BatchKey, zip_path: str, combined_content: str) -> None:
+    """Remember a finished batch, evicting the least recently used ones."""
+    with _ZIP_LOCK:
+        _BATCH_CACHE[key] = (zip_path, combined_content)
+        _BATCH_CACHE.move_to_end(key)
+        while len(_BATCH_CACHE) > ZIP_KEEP:
+            _BATCH_CACHE.popitem(last=False)
+
+def _zip_write_file(zipf: zipfile.ZipFile, file_path: str, arcname: str) -> None:
+    """Add a file to the zip, storing already-compressed formats uncompressed."""
+    if _extension(file_path) in STORED_EXTENSIONS:
+        zipf.write(file_path, arcname, compress_type=zipfile.ZIP_STORED)
+    else:
+        zipf.write(file_path, arcname)
+
+def _zip_write_text(zipf: zipfile.ZipFile, arcname: str, text: str) -> None:
+    """Add a text entry to the zip without encoding large texts in one piece."""
+    if len(text) <= LARGE_TEXT_CHUNK:
+        zipf.writestr(arcname, text)
+        return
+    with zipf.open(arcname, 'w', force_zip64=True) as dst:
+        for start in range(0, len(text), LARGE_TEXT_CHUNK):
+            dst.write(text[start:start + LARGE_TEXT_CHUNK].encode('utf-8'))
+
+def write_zip_from_results(out: IO[bytes], results: List[ConversionResult], include_debug: bool = True,
+                           include_images: bool = True, overview_content: Optional[str] = None) -> None:
     """
-    Create a zip file from all conversion results.
+    Write a zip archive of all conversion results to a binary stream.
+    
+    Lets callers stream the archive straight to its destination (e.g. a
+    BytesIO or SpooledTemporaryFile for an HTTP response) instead of writing
+    it to disk and reading it back.
     
     Args:
+        out: Writable binary stream; left open
         results: List of ConversionResult objects
         include_debug: Whether to include debug files
         include_images: Whether to include images
-        
-    Returns:
-        Path to the created zip file
+        overview_content: Pre-rendered overview; defaults to create_overview_content(results)
     """
-    # Create temporary zip file
-    zip_file = tempfile.NamedTemporaryFile(delete=False, suffix=".zip")
-    zip_path = zip_file.name
-    zip_file.close()
-    
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    with zipfile.ZipFile(
+        out, 'w', zipfile.ZIP_DEFLATED,
+        compresslevel=ZIP_COMPRESSLEVEL, allowZip64=True, strict_timestamps=False
+    ) as zipf:
         # Add each result
         for i, result in enumerate(results):
             if not result.success:
@@ -281,61 +1060,134 @@ def create_zip_from_results(results: List[ConversionResult], include_debug: bool
             
             # Add main text
             if result.markdown_content:
-                zipf.writestr(f"{pdf_dir}/converted_text.md", result.markdown_content)
-            
-            # Add all output files
-            for file_path in result.output_files:
-                if os.path.exists(file_path):
-                    # Determine relative name within zip
-                    rel_path = os.path.relpath(file_path, result.output_dir)
-                    zip_path_in_zip = f"{pdf_dir}/output/{rel_path}"
-                    zipf.write(file_path, zip_path_in_zip)
+                _zip_write_text(zipf, f"{pdf_dir}/converted_text.md", result.markdown_content)
             
-            # Add debug files (optional)
-            if include_debug and result.debug_files:
-                for file_path in result.debug_files:
-                    if os.path.exists(file_path):
-                        rel_path = os.path.relpath(file_path, result.output_dir)
-                        zip_path_in_zip = f"{pdf_dir}/debug/{rel_path}"
-                        zipf.write(file_path, zip_path_in_zip)
+            # Add all output files, then the optional debug files and images.
+            # Files were just collected, so a vanished file is the exception.
+            entries = [("output", result.output_files)]
+            if include_debug:
+                entries.append(("debug", result.debug_files))
+            if include_images:
+                entries.append(("images", result.image_files))
             
-            # Add images (optional)
-            if include_images and result.image_files:
-                for file_path in result.image_files:
-                    if os.path.exists(file_path):
-                        rel_path = os.path.relpath(file_path, result.output_dir)
-                        zip_path_in_zip = f"{pdf_dir}/images/{rel_path}"
-                        zipf.write(file_path, zip_path_in_zip)
+            # Collected files live below output_dir, so their relative name is a
+            # plain slice; relpath is only needed for files found elsewhere
+            output_dir = result.output_dir
+            prefix = os.path.join(output_dir, "") if output_dir else None
+            for subdir, file_paths in entries:
+                for file_path in file_paths:
+                    # Determine relative name within zip
+                    if prefix is not None and file_path.startswith(prefix):
+                        rel_path = file_path[len(prefix):]
+                    else:
+                        rel_path = os.path.relpath(file_path, output_dir)
+                    try:
+                        _zip_write_file(zipf, file_path, f"{pdf_dir}/{subdir}/{rel_path}")
+                    except FileNotFoundError:
+                        continue
         
         # Add overview
-        overview_content = create_overview_content(results)
-        zipf.writestr("00_OVERVIEW.md", overview_content)
+        if overview_content is None:
+            overview_content = create_overview_content(results)
+        _zip_write_text(zipf, "00_OVERVIEW.md", overview_content)
+
+def create_zip_from_results(results: List[ConversionResult], include_debug: bool = True, include_images: bool = True,
+                            overview_content: Optional[str] = None) -> str:
+    """
+    Create a zip file from all conversion results.
     
-    return zip_path
+    Args:
+        results: List of ConversionResult objects
+        include_debug: Whether to include debug files
+        include_images: Whether to include images
+        overview_content: Pre-rendered overview; defaults to create_overview_content(results)
+        
+    Returns:
+        Path to the created zip file
+    """
+    # Create temporary zip file; zipfile emits many small writes, so they are
+    # coalesced through a large buffer instead of the default 8 KiB one
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip", dir=get_zip_dir(),
+                                     buffering=ZIP_WRITE_BUFFER) as zip_file:
+        write_zip_from_results(zip_file, results, include_debug, include_images, overview_content)
+    _retain_zip(zip_file.name)
+    return zip_file.name
+
+# The combined Markdown returned next to the zip feeds the UI preview, so its
+# size is capped (MARKER_PREVIEW_CHARS, 0 = no cap); the zip has the full texts.
+PREVIEW_MAX_CHARS: Final[int] = max(0, int(os.getenv("MARKER_PREVIEW_CHARS", str(256 * 1024))))
+
+def build_combined_preview(results: List[ConversionResult], overview_content: str,
+                           texts_heading: str, truncated_note: str) -> str:
+    """
+    Combine the overview and converted texts into one Markdown preview.
+    
+    Texts are added until PREVIEW_MAX_CHARS is reached; the rest is cut off and
+    marked with truncated_note, so large batches are not copied into one string.
+    
+    Args:
+        results: List of ConversionResult objects
+        overview_content: Rendered overview placed at the top
+        texts_heading: Heading placed between the overview and the texts
+        truncated_note: Marker appended where the preview is cut off
+        
+    Returns:
+        The combined Markdown preview
+    """
+    parts = [overview_content, texts_heading]
+    remaining = PREVIEW_MAX_CHARS or sys.maxsize
+    for i, result in enumerate(results, 1):
+        if not result.success:
+            continue
+        if remaining <= 0:
+            parts.append(truncated_note)
+            break
+        text = result.markdown_content
+        parts.append(f"## {i}. {result.pdf_name}\n\n")
+        parts.append(text[:remaining])
+        if len(text) > remaining:
+            parts.append(truncated_note)
+            break
+        remaining -= len(text)
+        parts.append("\n\n---\n\n")
+    return "".join(parts)
 
 def create_overview_content(results: List[ConversionResult]) -> str:
     """Create overview of all conversions."""
-    content = "# PDF Conversion Overview\n\n"
-    content += f"**Total files:** {len(results)}\n"
-    content += f"**Successful:** {sum(1 for r in results if r.success)}\n"
-    content += f"**Failed:** {sum(1 for r in results if not r.success)}\n\n"
+    parts = ["# PDF Conversion Overview\n\n"]
+    successful = sum(1 for r in results if r.success)
+    parts.append(f"**Total files:** {len(results)}\n")
+    parts.append(f"**Successful:** {successful}\n")
+    parts.append(f"**Failed:** {len(results) - successful}\n\n")
     
     for i, result in enumerate(results, 1):
-        content += f"## {i}. {result.pdf_name}\n\n"
+        parts.append(f"## {i}. {result.pdf_name}\n\n")
         if result.success:
-            content += "✅ **Status:** Successfully converted\n"
-            content += f"📄 **Output files:** {len(result.output_files)}\n"
-            content += f"🐛 **Debug files:** {len(result.debug_files)}\n"
-            content += f"🖼️ **Images:** {len(result.image_files)}\n"
+            parts.append("✅ **Status:** Successfully converted\n")
+            parts.append(f"📄 **Output files:** {len(result.output_files)}\n")
+            parts.append(f"🐛 **Debug files:** {len(result.debug_files)}\n")
+            parts.append(f"🖼️ **Images:** {len(result.image_files)}\n")
         else:
-            content += "❌ **Status:** Failed\n"
-            content += f"**Error:** {result.error}\n"
-        content += "\n"
+            parts.append("❌ **Status:** Failed\n")
+            parts.append(f"**Error:** {result.error}\n")
+        parts.append("\n")
     
-    return content
+    return "".join(parts)
+
+def _uploaded_file_path(uploaded_file: Any) -> str:
+    """Get the file path from an uploaded file object or path."""
+    # Checked first: pathlib paths also have a name attribute (their basename)
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        return str(os.fspath(uploaded_file))
+    if hasattr(uploaded_file, 'name'):
+        return str(uploaded_file.name)
+    if hasattr(uploaded_file, 'path'):
+        return str(uploaded_file.path)
+    return str(uploaded_file)
 
 async def convert_multiple_pdfs_with_zip(uploaded_files: List[Any], settings: dict, 
-                                       include_debug: bool = True, include_images: bool = True) -> Tuple[str, str]:
+                                       include_debug: bool = True, include_images: bool = True,
+                                       progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[str, str]:
     """
     Convert multiple PDFs and create a zip file.
     
@@ -344,59 +1196,97 @@ async def convert_multiple_pdfs_with_zip(uploaded_files: List[Any], settings: di
         settings: Conversion settings
         include_debug: Whether to include debug files
         include_images: Whether to include images
+        progress_callback: Called on the event loop with (finished, total)
+            each time a file has been converted
         
     Returns:
         Tuple of (zip_file_path, combined_markdown_content)
     """
-    results = []
+    # Get the file paths from the uploaded files
+    file_paths = [_uploaded_file_path(f) for f in uploaded_files]
     
-    # Convert each file
-    for uploaded_file in uploaded_files:
-        # Get the file path from the uploaded file
-        if hasattr(uploaded_file, 'name'):
-            file_path = uploaded_file.name
-        elif hasattr(uploaded_file, 'path'):
-            file_path = uploaded_file.path
-        else:
-            file_path = str(uploaded_file)
-        
-        result = await convert_pdf_with_zip_output(file_path, settings)
-        results.append(result)
+    # The same PDFs with the same settings were converted recently
+    batch_key = await run_postprocess(_batch_cache_key, file_paths, settings, include_debug, include_images)
+    if batch_key is not None:
+        cached = _batch_cache_get(batch_key)
+        if cached is not None:
+            logger.info("♻️ Reusing cached zip for %d PDF(s)", len(file_paths))
+            if progress_callback is not None:
+                progress_callback(len(file_paths), len(file_paths))
+            return cached
     
-    # Create zip file
-    zip_path = create_zip_from_results(results, include_debug, include_images)
+    # Leave room for documents in the post-processing stage to overlap inference
+    semaphore = asyncio.Semaphore(MAX_WORKERS + POSTPROCESS_WORKERS)
     
-    # Create combined markdown content
-    combined_content = create_overview_content(results)
-    combined_content += "\n\n# Converted Texts\n\n"
+    async def convert_one(file_path: str) -> ConversionResult:
+        schedule_prefetch(file_path)
+        try:
+            async with semaphore:
+                return await convert_pdf_with_zip_output(file_path, settings)
+        except Exception as e:
+            # E.g. models that failed to load; record it so the other files still end up in the zip
+            logger.error("❌ Failed to convert %s: %s", file_path, e)
+            result = ConversionResult(os.path.basename(file_path))
+            result.error = str(e)
+            return result
     
-    for i, result in enumerate(results, 1):
-        if result.success:
-            combined_content += f"## {i}. {result.pdf_name}\n\n"
-            combined_content += result.markdown_content + "\n\n"
-            combined_content += "---\n\n"
+    finished = 0
+    
+    async def convert_and_report(file_path: str) -> ConversionResult:
+        nonlocal finished
+        result = await convert_one(file_path)
+        finished += 1
+        if progress_callback is not None:
+            progress_callback(finished, len(file_paths))
+        return result
+    
+    # Convert all files concurrently, bounded by the pipeline capacity
+    results = list(await asyncio.gather(*(convert_and_report(f) for f in file_paths)))
+    
+    # Create zip file; compressing all outputs must not stall the event loop
+    try:
+        zip_path = await run_postprocess(create_zip_from_results, results, include_debug, include_images)
+    finally:
+        # Everything worth keeping is in the zip now; drop the per-PDF output directories
+        await run_postprocess(cleanup_temp_directories, results)
+    
+    # Create combined markdown content (a capped preview; the zip holds the full texts)
+    combined_content = build_combined_preview(
+        results, create_overview_content(results), "\n\n# Converted Texts\n\n",
+        "\n\n*… preview truncated; the zip file contains the full text.*\n\n"
+    )
+    
+    # Only complete batches are reused; failed files should be retried next time
+    if batch_key is not None and all(r.success for r in results):
+        _batch_cache_put(batch_key, zip_path, combined_content)
     
     return zip_path, combined_content
 
 def cleanup_temp_directories(results: List[ConversionResult]) -> None:
     """Clean up temporary directories."""
     for result in results:
-        if result.output_dir and os.path.exists(result.output_dir):
+        if result.output_dir:
             try:
                 shutil.rmtree(result.output_dir)
-                print(f"🧹 Cleaned up temporary directory: {result.output_dir}")
+                logger.info("🧹 Cleaned up temporary directory: %s", result.output_dir)
+            except FileNotFoundError:
+                # Already gone; rmtree finds out without a separate exists() stat
+                pass
             except Exception as e:
-                print(f"⚠️ Could not clean up {result.output_dir}: {e}")
+                logger.warning("⚠️ Could not clean up %s: %s", result.output_dir, e)
 
-def get_converter_status() -> dict:
+def get_converter_status() -> Mapping[str, Any]:
     """
     Returns the current status of the converter initialization.
     
+    Models are loaded lazily, so before the first conversion (or an explicit
+    ensure_models() call) the status is "not_loaded".
+    
     Returns:
-        A dictionary containing status information.
+        A read-only mapping containing status information.
     """
-    return {
-        "initialized": CONVERTER is not None,
-        "status": "ready" if CONVERTER is not None else "failed",
-        "message": "Converter ready for PDF processing" if CONVERTER is not None else "Converter initialization failed"
-    }
+    if CONVERTER is not None:
+        return _STATUS_READY
+    if _STATUS_FAILED is not None:
+        return _STATUS_FAILED
+    return _STATUS_NOT_LOADED
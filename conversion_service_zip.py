@@ -4,342 +4,374 @@ Ondersteunt zowel enkele als meerdere PDF bestanden met volledige output verzame
 """
 
 import asyncio
-import tempfile
+import logging
 import os
-import traceback
-import zipfile
-import shutil
-from typing import Any, Dict, List, Tuple, Optional
-from pathlib import Path
-
-# Environment variables uit Marker scripts om threading problemen te voorkomen
-os.environ["MKL_DYNAMIC"] = "FALSE"
-os.environ["OMP_DYNAMIC"] = "FALSE"
-os.environ["OMP_NUM_THREADS"] = "1"  # Single thread to avoid multiprocessing issues
-os.environ["OPENBLAS_NUM_THREADS"] = "1"
-os.environ["MKL_NUM_THREADS"] = "1"
-os.environ["GRPC_VERBOSITY"] = "ERROR"
-os.environ["GLOG_minloglevel"] = "2"
-os.environ["PYTORCH_ENABLE_MPS_FALLBACK"] = "1"
-os.environ["IN_STREAMLIT"] = "true"  # Avoid multiprocessing inside surya
-
-from marker.converters.pdf import PdfConverter
-from marker.models import create_model_dict
-from marker.output import text_from_rendered
-from typing import Optional
-
-# Initialize the converter and models once when the module is loaded.
-CONVERTER: Optional[PdfConverter] = None
-
-try:
-    models = create_model_dict()
-    # Configure for single-threaded operation
-    config_dict = {
-        "pdftext_workers": 1,  # Single worker
-        "disable_multiprocessing": True,  # Disable multiprocessing
+import sys
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Dict, FrozenSet, List, Mapping, Tuple, Optional
+from types import MappingProxyType
+
+# conversion_service laadt zelf geen numpy/torch bij import, dus dit kan vóór THREAD_ENV
+from conversion_service import BLAS_THREAD_VARS, CUDA_DEVICE_PRESENT, MAX_CONCURRENCY
+
+# BLAS/OpenMP threads per pipeline: 1 op een GPU host (de CPU hoeft dan niet
+# met de GPU te concurreren), anders de CPU's verdeeld over de pipelines die
+# conversion_service tegelijk toelaat (MARKER_MAX_CONCURRENCY).
+_BLAS_THREADS = "1" if CUDA_DEVICE_PRESENT else str(max(1, (os.cpu_count() or 1) // MAX_CONCURRENCY))
+
+# Environment variables uit Marker scripts om threading problemen te voorkomen.
+# Ze werken alleen als ze gezet zijn voordat numpy/torch geladen worden; al
+# gezette waarden (bijv. uit de shell) blijven staan.
+THREAD_ENV = {
+    "MKL_DYNAMIC": "FALSE",
+    "OMP_DYNAMIC": "FALSE",
+    **dict.fromkeys(BLAS_THREAD_VARS, _BLAS_THREADS),
+    "GRPC_VERBOSITY": "ERROR",
+    "GLOG_minloglevel": "2",
+    "PYTORCH_ENABLE_MPS_FALLBACK": "1",
+    "IN_STREAMLIT": "true",  # Avoid multiprocessing inside surya
+}
+for _name, _value in THREAD_ENV.items():
+    os.environ.setdefault(_name, _value)
+
+# Modellen, resultaat type en bestand/zip helpers worden gedeeld met de geünificeerde conversion service
+import conversion_service
+from conversion_service import (
+    ConversionResult,
+    MAX_WORKERS,
+    build_combined_preview,
+    cleanup_temp_directories,
+    collect_all_files,
+    collect_debug_files,
+    collect_image_files,
+    collect_output_files,
+    ensure_models,
+    load_marker,
+    load_models,
+    make_output_dir,
+    post_convert_cleanup,
+    rendered_text,
+    run_converter,
+    run_postprocess,
+    schedule_prefetch,
+)
+
+if TYPE_CHECKING:
+    from marker.converters.pdf import PdfConverter
+
+# Logt via de queue-backed handler van conversion_service (geen stdout I/O op worker threads)
+logger = logging.getLogger("conversion_service.zip")
+
+def _apply_thread_limits() -> None:
+    """
+    Dwingt de thread instellingen alsnog af als torch/numpy al eerder geladen zijn.
+    
+    De environment variables hebben dan geen effect meer; voor torch kan het
+    aantal threads nog runtime gezet worden, voor numpy alleen gewaarschuwd.
+    """
+    if "numpy" in sys.modules and "torch" not in sys.modules:
+        logger.warning("⚠️ numpy was al geladen voor conversion_service_zip; thread environment variables hebben geen effect")
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return
+    num_threads = int(os.environ["OMP_NUM_THREADS"])
+    logger.warning("⚠️ torch was al geladen voor conversion_service_zip; threads runtime beperkt tot %d", num_threads)
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(num_threads)
+    except RuntimeError:
+        # Kan maar één keer, vóór het eerste parallelle werk
+        pass
+
+_apply_thread_limits()
+
+# Configuratie die ALTIJD geforceerd wordt voor stabiliteit
+FORCED_CONFIG: Mapping[str, Any] = MappingProxyType({
+    "pdftext_workers": 1,  # KRITIEK: Altijd 1 worker voor stabiliteit
+    "disable_multiprocessing": True,  # KRITIEK: Disable multiprocessing
+})
+
+# Basis instellingen die doorgegeven worden aan Marker (exclusief LLM instellingen)
+BASIC_SETTINGS: FrozenSet[str] = frozenset({
+    # Basis instellingen
+    "output_format", "page_range", "debug", 
+
+    # OCR instellingen
+    "force_ocr", "strip_existing_ocr", "disable_ocr", "languages",
+    "ocr_space_threshold", "ocr_newline_threshold", "ocr_alphanum_threshold",
+
+    # Layout & Document instellingen
+    "lowres_image_dpi", "highres_image_dpi", "layout_coverage_threshold", 
+    "document_ocr_threshold",
+
+    # Tabel instellingen
+    "detect_boxes", "max_table_rows", "row_split_threshold", "column_gap_ratio",
+
+    # Performance instellingen
+    "pdftext_workers", "recognition_batch_size", "detection_batch_size",
+
+    # Output instellingen
+    "extract_images", "paginate_output", "page_separator", "disable_links",
+
+    # Debug instellingen
+    "debug_layout_images", "debug_pdf_images", "debug_json",
+})
+
+# LLM-specifieke instellingen die doorgegeven worden aan Marker
+LLM_SETTINGS: FrozenSet[str] = frozenset({
+    "max_retries", "max_concurrency", "timeout", "temperature", "max_tokens",
+    "use_llm_layout", "use_llm_table", "use_llm_equation", "use_llm_handwriting",
+    "use_llm_complex_region", "use_llm_form", "use_llm_image_description", 
+    "use_llm_table_merge", "use_llm_text",
+    "layout_prompt", "table_prompt", "equation_prompt", "handwriting_prompt",
+    "complex_relabeling_prompt", "table_rewriting_prompt", "table_merge_prompt", 
+    "image_description_prompt",
+    "confidence_threshold", "picture_height_threshold", "min_equation_height",
+    "equation_image_expansion_ratio", "max_rows_per_batch", "table_image_expansion_ratio",
+    "table_height_threshold", "table_start_threshold", "vertical_table_height_threshold",
+    "vertical_table_distance_threshold", "horizontal_table_width_threshold",
+    "horizontal_table_distance_threshold", "column_gap_threshold", "image_expansion_ratio",
+})
+
+# Batch sizes van 0 worden overgeslagen om division by zero te voorkomen
+BATCH_SIZE_KEYS = frozenset({"batch_size", "recognition_batch_size", "detection_batch_size"})
+
+# Standaardwaarden per LLM provider, voor instellingen die niet meegegeven zijn
+PROVIDER_DEFAULTS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "gemini": MappingProxyType({"gemini_model_name": "gemini-2.0-flash"}),
+    "openai": MappingProxyType({"openai_model_name": "gpt-4o", "openai_base_url": None}),
+    "anthropic": MappingProxyType({"anthropic_model_name": "claude-3-5-sonnet-20241022"}),
+    "azure": MappingProxyType({
+        "azure_endpoint": "",
+        "azure_deployment": "",
+        "azure_api_version": "2024-02-15-preview",
+    }),
+    "ollama": MappingProxyType({"ollama_base_url": "http://localhost:11434", "ollama_model_name": "llama3.2:latest"}),
+    "custom": MappingProxyType({"custom_base_url": "", "custom_model_name": ""}),
+})
+
+def _provider_settings(provider: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Provider instellingen uit settings, aangevuld met de standaardwaarden."""
+    defaults = PROVIDER_DEFAULTS[provider]
+    return {**defaults, **{key: settings[key] for key in defaults.keys() & settings.keys()}}
+
+def _no_llm_config(settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Onbekende provider: geen LLM configuratie."""
+    return None
+
+def _gemini_config(settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """LLM configuratie voor Google Gemini, of None zonder API key."""
+    if not settings.get("google_api_key"):
+        return None
+    return {
+        "use_llm": True,
+        "llm_service": "marker.services.gemini.GoogleGeminiService",
+        "google_api_key": settings["google_api_key"],
+        **_provider_settings("gemini", settings),
     }
-    CONVERTER = PdfConverter(artifact_dict=models, config=config_dict)
-    print("Marker PDF Converter initialized successfully (single-threaded).")
-except Exception as e:
-    print(f"Error initializing Marker PDF Converter: {e}")
-    CONVERTER = None
-
-class ConversionResult:
-    """Resultaat van een PDF conversie met alle gegenereerde bestanden."""
+
+def _openai_config(settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """LLM configuratie voor OpenAI, of None zonder API key."""
+    if not settings.get("openai_api_key"):
+        return None
+    return {
+        "use_llm": True,
+        "llm_service": "marker.services.openai.OpenAIService",
+        "openai_api_key": settings["openai_api_key"],
+        **_provider_settings("openai", settings),
+    }
+
+def _anthropic_config(settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """LLM configuratie voor Anthropic, of None zonder API key."""
+    if not settings.get("anthropic_api_key"):
+        return None
+    return {
+        "use_llm": True,
+        "llm_service": "marker.services.claude.ClaudeService",
+        "anthropic_api_key": settings["anthropic_api_key"],
+        **_provider_settings("anthropic", settings),
+    }
+
+def _azure_config(settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """LLM configuratie voor Azure OpenAI, of None zonder API key."""
+    if not settings.get("azure_api_key"):
+        return None
+    return {
+        "use_llm": True,
+        "llm_service": "marker.services.azure_openai.AzureOpenAIService",
+        "azure_api_key": settings["azure_api_key"],
+        **_provider_settings("azure", settings),
+    }
+
+def _ollama_config(settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """LLM configuratie voor Ollama (geen API key nodig)."""
+    ollama = _provider_settings("ollama", settings)
+    return {
+        "use_llm": True,
+        "llm_service": "marker.services.ollama.OllamaService",
+        "ollama_base_url": ollama["ollama_base_url"],
+        "ollama_model": ollama["ollama_model_name"],  # Marker kent de setting als ollama_model
+    }
+
+def _custom_config(settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """LLM configuratie voor een custom provider, of None zonder API key."""
+    if not settings.get("custom_api_key"):
+        return None
+    return {
+        "use_llm": True,
+        "llm_service": "custom",
+        "custom_api_key": settings["custom_api_key"],
+        **_provider_settings("custom", settings),
+    }
+
+# LLM provider naam -> functie die de config uitbreiding geeft (None = LLM uit).
+# llm_service blijft een dotted path: PdfConverter resolvet alleen strings en doet
+# dat één keer per converter, die via de pool hergebruikt wordt.
+LLM_PROVIDERS: Mapping[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = MappingProxyType({
+    "gemini": _gemini_config,
+    "openai": _openai_config,
+    "anthropic": _anthropic_config,
+    "azure": _azure_config,
+    "ollama": _ollama_config,
+    "custom": _custom_config,
+})
+
+def checkout_pooled_converter(direct_config: Dict[str, Any]) -> ContextManager["PdfConverter"]:
+    """
+    Leent een (hergebruikte) PdfConverter voor deze configuratie uit de gedeelde pool.
     
-    def __init__(self, pdf_name: str):
-        self.pdf_name = pdf_name
-        self.markdown_content = ""
-        self.html_content = ""
-        self.json_content = ""
-        self.output_files: List[str] = []  # Alle gegenereerde bestanden
-        self.debug_files: List[str] = []  # Debug bestanden
-        self.image_files: List[str] = []   # Geëxtraheerde afbeeldingen
-        self.success = False
-        self.error: str = ""
-        self.output_dir: Optional[str] = None
+    Args:
+        direct_config: De volledige Marker configuratie voor deze conversie
+        
+    Returns:
+        Context manager met een converter voor exclusief gebruik; nieuw gebouwd
+        bij debug output
+    """
+    key = conversion_service.output_converter_key(direct_config)
+    return conversion_service.lend_converter(key, lambda: load_marker().PdfConverter(
+        config=direct_config,
+        artifact_dict=load_models(),
+        llm_service=direct_config.get("llm_service")
+    ))
 
-async def convert_pdf_with_zip_output(pdf_path: str, settings: dict) -> ConversionResult:
+def build_direct_config(settings: dict, output_dir: str) -> Dict[str, Any]:
     """
-    Converteert een PDF en verzamelt alle gegenereerde bestanden voor zip output.
+    Vertaal de gebruikersinstellingen naar de Marker config voor één conversie.
     
     Args:
-        pdf_path: Het pad naar het PDF bestand
         settings: Dictionary met Marker configuratie opties
+        output_dir: Output directory van deze conversie
         
     Returns:
-        ConversionResult object met alle gegenereerde bestanden
+        Config met de geforceerde instellingen, de basis instellingen en de LLM instellingen
     """
-    if CONVERTER is None:
-        raise RuntimeError("Marker PDF Converter is not available. Check initialization logs.")
-
-    result = ConversionResult(os.path.basename(pdf_path))
+    # Filter None waarden en batch_size waarden van 0 (division by zero in Marker) uit settings
+    filtered_settings = {
+        k: v for k, v in settings.items()
+        if v is not None and not (k in BATCH_SIZE_KEYS and v == 0)
+    }
     
-    def blocking_conversion() -> ConversionResult:
-        """
-        Een synchrone wrapper voor de marker-conversieaanroep met volledige output verzameling.
-        """
-        try:
-            # Maak een tijdelijke output directory voor deze conversie
-            temp_output_dir = tempfile.mkdtemp(prefix=f"marker_output_{os.path.splitext(result.pdf_name)[0]}_")
-            result.output_dir = temp_output_dir
-            
-            # Filter None waarden uit settings
-            filtered_settings = {k: v for k, v in settings.items() if v is not None}
-            
-            # Maak een basis config dict - ALTIJD met 1 worker voor stabiliteit
-            direct_config: dict[str, Any] = {
-                "pdftext_workers": 1,  # KRITIEK: Altijd 1 worker voor stabiliteit
-                "disable_multiprocessing": True,  # KRITIEK: Disable multiprocessing
-                "output_dir": temp_output_dir,  # Zet output directory
-                "debug_data_folder": os.path.join(temp_output_dir, "debug_data"),  # Debug data in output dir
-            }
-            
-            # Voeg alle basis instellingen toe (exclusief LLM instellingen)
-            basic_settings = [
-                # Basis instellingen
-                "output_format", "page_range", "debug", 
-                
-                # OCR instellingen
-                "force_ocr", "strip_existing_ocr", "disable_ocr", "languages",
-                "ocr_space_threshold", "ocr_newline_threshold", "ocr_alphanum_threshold",
-                
-                # Layout & Document instellingen
-                "lowres_image_dpi", "highres_image_dpi", "layout_coverage_threshold", 
-                "document_ocr_threshold",
-                
-                # Tabel instellingen
-                "detect_boxes", "max_table_rows", "row_split_threshold", "column_gap_ratio",
-                
-                # Performance instellingen
-                "pdftext_workers", "recognition_batch_size", "detection_batch_size",
-                
-                # Output instellingen
-                "extract_images", "paginate_output", "page_separator", "disable_links",
-                
-                # Debug instellingen
-                "debug_layout_images", "debug_pdf_images", "debug_json",
-            ]
-            
-            # Voeg basis instellingen toe
-            for key in basic_settings:
-                if key in filtered_settings:
-                    value = filtered_settings[key]
-                    # Skip batch_size waarden die 0 zijn om division by zero te voorkomen
-                    if key in ["batch_size", "recognition_batch_size", "detection_batch_size"] and value == 0:
-                        continue
-                    # KRITIEK: Overschrijf pdftext_workers ALTIJD met 1 voor stabiliteit
-                    if key == "pdftext_workers":
-                        print(f"🔒 Overriding pdftext_workers to 1 (was: {value})")
-                        direct_config[key] = 1
-                    else:
-                        direct_config[key] = value
-            
-            # Handle LLM instellingen correct
-            use_llm = filtered_settings.get("use_llm", True)
-            llm_provider = filtered_settings.get("llm_provider", "ollama")
-            
-            # Configureer LLM instellingen op basis van provider
-            if use_llm:
-                print(f"🔍 Debug: Configuring LLM with provider: {llm_provider}")
-                
-                if llm_provider == "gemini":
-                    if "google_api_key" in filtered_settings and filtered_settings["google_api_key"]:
-                        direct_config.update({
-                            "use_llm": True,
-                            "llm_service": "marker.services.gemini.GoogleGeminiService",
-                            "google_api_key": filtered_settings["google_api_key"],
-                            "gemini_model_name": filtered_settings.get("gemini_model_name", "gemini-2.0-flash")
-                        })
-                    else:
-                        use_llm = False
-                        
-                elif llm_provider == "openai":
-                    if "openai_api_key" in filtered_settings and filtered_settings["openai_api_key"]:
-                        direct_config.update({
-                            "use_llm": True,
-                            "llm_service": "marker.services.openai.OpenAIService",
-                            "openai_api_key": filtered_settings["openai_api_key"],
-                            "openai_model_name": filtered_settings.get("openai_model_name", "gpt-4o"),
-                            "openai_base_url": filtered_settings.get("openai_base_url", None)
-                        })
-                    else:
-                        use_llm = False
-                        
-                elif llm_provider == "anthropic":
-                    if "anthropic_api_key" in filtered_settings and filtered_settings["anthropic_api_key"]:
-                        direct_config.update({
-                            "use_llm": True,
-                            "llm_service": "marker.services.claude.ClaudeService",
-                            "anthropic_api_key": filtered_settings["anthropic_api_key"],
-                            "anthropic_model_name": filtered_settings.get("anthropic_model_name", "claude-3-5-sonnet-20241022")
-                        })
-                    else:
-                        use_llm = False
-                        
-                elif llm_provider == "azure":
-                    if "azure_api_key" in filtered_settings and filtered_settings["azure_api_key"]:
-                        direct_config.update({
-                            "use_llm": True,
-                            "llm_service": "marker.services.azure_openai.AzureOpenAIService",
-                            "azure_api_key": filtered_settings["azure_api_key"],
-                            "azure_endpoint": filtered_settings.get("azure_endpoint", ""),
-                            "azure_deployment": filtered_settings.get("azure_deployment", ""),
-                            "azure_api_version": filtered_settings.get("azure_api_version", "2024-02-15-preview")
-                        })
-                    else:
-                        use_llm = False
-                        
-                elif llm_provider == "ollama":
-                    direct_config.update({
-                        "use_llm": True,
-                        "llm_service": "marker.services.ollama.OllamaService",
-                        "ollama_base_url": filtered_settings.get("ollama_base_url", "http://localhost:11434"),
-                        "ollama_model": filtered_settings.get("ollama_model_name", "llama3.2:latest")
-                    })
-                    
-                elif llm_provider == "custom":
-                    if "custom_api_key" in filtered_settings and filtered_settings["custom_api_key"]:
-                        direct_config.update({
-                            "use_llm": True,
-                            "llm_service": "custom",
-                            "custom_api_key": filtered_settings["custom_api_key"],
-                            "custom_base_url": filtered_settings.get("custom_base_url", ""),
-                            "custom_model_name": filtered_settings.get("custom_model_name", "")
-                        })
-                    else:
-                        use_llm = False
-            
-            # Voeg alle LLM-specifieke instellingen toe
-            llm_settings = [
-                "max_retries", "max_concurrency", "timeout", "temperature", "max_tokens",
-                "use_llm_layout", "use_llm_table", "use_llm_equation", "use_llm_handwriting",
-                "use_llm_complex_region", "use_llm_form", "use_llm_image_description", 
-                "use_llm_table_merge", "use_llm_text",
-                "layout_prompt", "table_prompt", "equation_prompt", "handwriting_prompt",
-                "complex_relabeling_prompt", "table_rewriting_prompt", "table_merge_prompt", 
-                "image_description_prompt",
-                "confidence_threshold", "picture_height_threshold", "min_equation_height",
-                "equation_image_expansion_ratio", "max_rows_per_batch", "table_image_expansion_ratio",
-                "table_height_threshold", "table_start_threshold", "vertical_table_height_threshold",
-                "vertical_table_distance_threshold", "horizontal_table_width_threshold",
-                "horizontal_table_distance_threshold", "column_gap_threshold", "image_expansion_ratio",
-            ]
-            
-            for key in llm_settings:
-                if key in filtered_settings:
-                    value = filtered_settings[key]
-                    if key in ["batch_size", "recognition_batch_size", "detection_batch_size"] and value == 0:
-                        continue
-                    direct_config[key] = value
-            
-            print(f"🔍 Debug: Converting {result.pdf_name} with output directory: {temp_output_dir}")
-            print(f"🔍 Debug: Direct config keys: {list(direct_config.keys())}")
-            print(f"🔍 Debug: Direct config values: {direct_config}")
-            
-            # Extract llm_service from config if present
-            llm_service = direct_config.get("llm_service")
-            
-            converter = PdfConverter(
-                config=direct_config,
-                artifact_dict=models,
-                llm_service=llm_service
-            )
-            
-            # Voer de conversie uit
-            rendered_document = converter(pdf_path)
-            text, _, _ = text_from_rendered(rendered_document)
-            
-            # Sla de hoofdtekst op
-            result.markdown_content = str(text)
-            
-            # Verzamel alle gegenereerde bestanden
-            result.output_files = collect_output_files(temp_output_dir)
-            result.debug_files = collect_debug_files(temp_output_dir)
-            result.image_files = collect_image_files(temp_output_dir)
-            
-            result.success = True
-            print(f"✅ Successfully converted {result.pdf_name} with {len(result.output_files)} output files")
-            
-            return result
-            
-        except Exception as e:
-            print(f"❌ Failed to convert {result.pdf_name}: {e}")
-            result.error = str(e)
-            result.success = False
-            return result
+    # Maak een basis config dict - ALTIJD met 1 worker voor stabiliteit
+    direct_config: dict[str, Any] = {
+        **FORCED_CONFIG,
+        "output_dir": output_dir,  # Zet output directory
+        "debug_data_folder": os.path.join(output_dir, "debug_data"),  # Debug data in output dir
+    }
     
-    try:
-        # Run the blocking function in a separate thread
-        result = await asyncio.to_thread(blocking_conversion)
-        return result
-    except Exception as e:
-        print(f"An error occurred during PDF conversion: {e}")
-        result.error = str(e)
-        result.success = False
-        return result
-
-def collect_output_files(output_dir: str) -> List[str]:
-    """Verzamel alle output bestanden uit de output directory."""
-    files: List[str] = []
-    if not os.path.exists(output_dir):
-        return files
+    # Voeg basis instellingen toe
+    for key in filtered_settings.keys() & BASIC_SETTINGS:
+        value = filtered_settings[key]
+        # KRITIEK: Overschrijf pdftext_workers ALTIJD met 1 voor stabiliteit
+        if key == "pdftext_workers":
+            logger.info("🔒 Overriding pdftext_workers to 1 (was: %s)", value)
+            direct_config[key] = 1
+        else:
+            direct_config[key] = value
     
-    for root, dirs, filenames in os.walk(output_dir):
-        for filename in filenames:
-            file_path = os.path.join(root, filename)
-            # Skip tijdelijke bestanden
-            if not filename.startswith('.') and not filename.endswith('.tmp'):
-                files.append(file_path)
+    # Handle LLM instellingen correct
+    use_llm = filtered_settings.get("use_llm", True)
+    llm_provider = filtered_settings.get("llm_provider", "ollama")
     
-    return files
-
-def collect_debug_files(output_dir: str) -> List[str]:
-    """Verzamel debug bestanden (images, JSON, etc.)."""
-    debug_files: List[str] = []
-    if not os.path.exists(output_dir):
-        return debug_files
+    # Configureer LLM instellingen op basis van provider
+    if use_llm:
+        logger.debug("🔍 Configuring LLM with provider: %s", llm_provider)
+        
+        provider_config = LLM_PROVIDERS.get(llm_provider, _no_llm_config)(filtered_settings)
+        if provider_config is not None:
+            direct_config.update(provider_config)
     
-    # Zoek naar debug directories binnen de output directory
-    debug_dirs = ['debug_data', 'debug_images', 'layout_images', 'pdf_images']
+    # Voeg alle LLM-specifieke instellingen toe
+    for key in filtered_settings.keys() & LLM_SETTINGS:
+        direct_config[key] = filtered_settings[key]
     
-    for debug_dir in debug_dirs:
-        debug_path = os.path.join(output_dir, debug_dir)
-        if os.path.exists(debug_path):
-            for root, dirs, filenames in os.walk(debug_path):
-                for filename in filenames:
-                    file_path = os.path.join(root, filename)
-                    debug_files.append(file_path)
+    return direct_config
+
+def _run_inference(pdf_path: str, settings: dict, result: ConversionResult) -> Tuple[Any, str]:
+    """
+    Inference stap: voer de Marker pipeline uit en geef het gerenderde document terug.
+    """
+    # Maak een tijdelijke output directory voor deze conversie; staat meteen op
+    # het resultaat, zodat hij ook na een fout opgeruimd wordt
+    temp_output_dir = make_output_dir(result.pdf_name)
+    result.output_dir = temp_output_dir
+    direct_config = build_direct_config(settings, temp_output_dir)
     
-    # Ook zoeken in de huidige directory voor backward compatibility
-    current_debug_path = os.path.join(os.getcwd(), 'debug_data')
-    if os.path.exists(current_debug_path):
-        for root, dirs, filenames in os.walk(current_debug_path):
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
-                debug_files.append(file_path)
+    # Lazy %s formattering: de config wordt alleen geformatteerd als debug logging aan staat
+    logger.debug("🔍 Converting %s with output directory: %s", result.pdf_name, temp_output_dir)
+    logger.debug("🔍 Direct config values: %s", direct_config)
     
-    return debug_files
+    # Leen een converter met dezelfde configuratie uit de pool en voer de conversie uit
+    with checkout_pooled_converter(direct_config) as converter:
+        return run_converter(converter, pdf_path), temp_output_dir
 
-def collect_image_files(output_dir: str) -> List[str]:
-    """Verzamel geëxtraheerde afbeeldingen."""
-    image_files: List[str] = []
-    if not os.path.exists(output_dir):
-        return image_files
+def _postprocess(result: ConversionResult, rendered_document: Any, temp_output_dir: str) -> ConversionResult:
+    """
+    Nabewerking stap: tekst extractie en het verzamelen van de output bestanden.
+    """
+    # Sla de hoofdtekst op en geef het gerenderde document vrij
+    result.markdown_content = rendered_text(rendered_document)
+    del rendered_document
+    post_convert_cleanup()
     
-    image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp']
+    # Verzamel alle gegenereerde bestanden
+    result.output_files, result.debug_files, result.image_files = collect_all_files(temp_output_dir)
     
-    for root, dirs, filenames in os.walk(output_dir):
-        for filename in filenames:
-            if any(filename.lower().endswith(ext) for ext in image_extensions):
-                file_path = os.path.join(root, filename)
-                image_files.append(file_path)
+    result.success = True
+    logger.info("✅ Successfully converted %s with %d output files", result.pdf_name, len(result.output_files))
+    return result
+
+async def convert_pdf_with_zip_output(pdf_path: str, settings: dict) -> ConversionResult:
+    """
+    Converteert een PDF en verzamelt alle gegenereerde bestanden voor zip output.
     
-    return image_files
+    Args:
+        pdf_path: Het pad naar het PDF bestand
+        settings: Dictionary met Marker configuratie opties
+        
+    Returns:
+        ConversionResult object met alle gegenereerde bestanden
+    """
+    await ensure_models()
+
+    result = ConversionResult(os.path.basename(pdf_path))
+    
+    try:
+        # Inference op de conversie pool van conversion_service (MARKER_WORKERS); de
+        # nabewerking gaat naar de gedeelde nabewerking pool, zodat de worker meteen
+        # vrij is voor de volgende PDF
+        loop = asyncio.get_running_loop()
+        rendered_document, temp_output_dir = await loop.run_in_executor(
+            conversion_service._EXECUTOR, _run_inference, pdf_path, settings, result
+        )
+        return await run_postprocess(_postprocess, result, rendered_document, temp_output_dir)
+    except Exception as e:
+        logger.error("❌ Failed to convert %s: %s", result.pdf_name, e)
+        result.error = str(e)
+        result.success = False
+        return result
 
 def create_zip_from_results(results: List[ConversionResult], include_debug: bool = True, include_images: bool = True) -> str:
     """
-    Maak een zip bestand van alle conversie resultaten.
+    Maak een zip bestand van alle conversie resultaten, met een Nederlands overzicht.
     
     Args:
         results: Lijst van ConversionResult objecten
@@ -349,88 +381,35 @@ def create_zip_from_results(results: List[ConversionResult], include_debug: bool
     Returns:
         Pad naar het gemaakte zip bestand
     """
-    # Maak een tijdelijke zip file
-    zip_file = tempfile.NamedTemporaryFile(delete=False, suffix=".zip")
-    zip_path = zip_file.name
-    zip_file.close()
-    
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        # Voeg elk resultaat toe
-        for i, result in enumerate(results):
-            if not result.success:
-                continue
-                
-            # Maak een directory voor dit PDF bestand
-            pdf_base_name = os.path.splitext(result.pdf_name)[0]
-            pdf_dir = f"{i+1:02d}_{pdf_base_name}"
-            
-            # Voeg de hoofdtekst toe
-            if result.markdown_content:
-                zipf.writestr(f"{pdf_dir}/converted_text.md", result.markdown_content)
-            
-            # Voeg alle output bestanden toe
-            for file_path in result.output_files:
-                if os.path.exists(file_path):
-                    # Bepaal de relatieve naam binnen de zip
-                    rel_path = os.path.relpath(file_path, result.output_dir)
-                    zip_path_in_zip = f"{pdf_dir}/output/{rel_path}"
-                    zipf.write(file_path, zip_path_in_zip)
-            
-            # Voeg debug bestanden toe (optioneel)
-            if include_debug and result.debug_files:
-                for file_path in result.debug_files:
-                    if os.path.exists(file_path):
-                        rel_path = os.path.relpath(file_path, result.output_dir)
-                        zip_path_in_zip = f"{pdf_dir}/debug/{rel_path}"
-                        zipf.write(file_path, zip_path_in_zip)
-            
-            # Voeg afbeeldingen toe (optioneel)
-            if include_images and result.image_files:
-                for file_path in result.image_files:
-                    if os.path.exists(file_path):
-                        rel_path = os.path.relpath(file_path, result.output_dir)
-                        zip_path_in_zip = f"{pdf_dir}/images/{rel_path}"
-                        zipf.write(file_path, zip_path_in_zip)
-        
-        # Voeg een overzicht toe
-        overview_content = create_overview_content(results)
-        zipf.writestr("00_OVERVIEW.md", overview_content)
-    
-    return zip_path
+    return conversion_service.create_zip_from_results(
+        results, include_debug, include_images, overview_content=create_overview_content(results)
+    )
 
 def create_overview_content(results: List[ConversionResult]) -> str:
     """Maak een overzicht van alle conversies."""
-    content = "# PDF Conversie Overzicht\n\n"
-    content += f"**Totaal bestanden:** {len(results)}\n"
-    content += f"**Succesvol:** {sum(1 for r in results if r.success)}\n"
-    content += f"**Mislukt:** {sum(1 for r in results if not r.success)}\n\n"
+    parts = ["# PDF Conversie Overzicht\n\n"]
+    successful = sum(1 for r in results if r.success)
+    parts.append(f"**Totaal bestanden:** {len(results)}\n")
+    parts.append(f"**Succesvol:** {successful}\n")
+    parts.append(f"**Mislukt:** {len(results) - successful}\n\n")
     
     for i, result in enumerate(results, 1):
-        content += f"## {i}. {result.pdf_name}\n\n"
+        parts.append(f"## {i}. {result.pdf_name}\n\n")
         if result.success:
-            content += f"✅ **Status:** Succesvol geconverteerd\n"
-            content += f"📄 **Output bestanden:** {len(result.output_files)}\n"
-            content += f"🐛 **Debug bestanden:** {len(result.debug_files)}\n"
-            content += f"🖼️ **Afbeeldingen:** {len(result.image_files)}\n"
+            parts.append(f"✅ **Status:** Succesvol geconverteerd\n")
+            parts.append(f"📄 **Output bestanden:** {len(result.output_files)}\n")
+            parts.append(f"🐛 **Debug bestanden:** {len(result.debug_files)}\n")
+            parts.append(f"🖼️ **Afbeeldingen:** {len(result.image_files)}\n")
         else:
-            content += f"❌ **Status:** Mislukt\n"
-            content += f"**Fout:** {result.error}\n"
-        content += "\n"
+            parts.append(f"❌ **Status:** Mislukt\n")
+            parts.append(f"**Fout:** {result.error}\n")
+        parts.append("\n")
     
-    return content
-
-def cleanup_temp_directories(results: List[ConversionResult]) -> None:
-    """Ruim tijdelijke directories op."""
-    for result in results:
-        if result.output_dir and os.path.exists(result.output_dir):
-            try:
-                shutil.rmtree(result.output_dir)
-                print(f"🧹 Cleaned up temporary directory: {result.output_dir}")
-            except Exception as e:
-                print(f"⚠️ Could not clean up {result.output_dir}: {e}")
+    return "".join(parts)
 
 async def convert_multiple_pdfs_with_zip(uploaded_files: List[Any], settings: dict, 
-                                       include_debug: bool = True, include_images: bool = True) -> Tuple[str, str]:
+                                       include_debug: bool = True, include_images: bool = True,
+                                       progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[str, str]:
     """
     Converteer meerdere PDF's en maak een zip bestand.
     
@@ -439,31 +418,53 @@ async def convert_multiple_pdfs_with_zip(uploaded_files: List[Any], settings: di
         settings: Conversie instellingen
         include_debug: Of debug bestanden moeten worden opgenomen
         include_images: Of afbeeldingen moeten worden opgenomen
+        progress_callback: Wordt op de event loop aangeroepen met (klaar, totaal)
+            telkens als een bestand geconverteerd is
         
     Returns:
         Tuple van (zip_file_path, combined_markdown_content)
     """
-    results = []
+    semaphore = asyncio.Semaphore(MAX_WORKERS)
+    
+    async def convert_one(uploaded_file: Any) -> ConversionResult:
+        # Gradio levert paden (str) of bestand objecten; beide worden een pad
+        pdf_path = conversion_service._uploaded_file_path(uploaded_file)
+        # Laat de kernel het PDF al inlezen terwijl het op een worker wacht
+        schedule_prefetch(pdf_path)
+        try:
+            async with semaphore:
+                return await convert_pdf_with_zip_output(pdf_path, settings)
+        except Exception as e:
+            # Bijv. modellen die niet laden; de overige bestanden komen dan nog steeds in de zip
+            logger.error("❌ Failed to convert %s: %s", pdf_path, e)
+            result = ConversionResult(os.path.basename(pdf_path))
+            result.error = str(e)
+            return result
     
-    # Converteer elk bestand
-    for uploaded_file in uploaded_files:
-        result = await convert_pdf_with_zip_output(uploaded_file.name, settings)
-        results.append(result)
+    finished = 0
     
-    # Maak zip bestand
-    zip_path = create_zip_from_results(results, include_debug, include_images)
+    async def convert_and_report(uploaded_file: Any) -> ConversionResult:
+        nonlocal finished
+        result = await convert_one(uploaded_file)
+        finished += 1
+        if progress_callback is not None:
+            progress_callback(finished, len(uploaded_files))
+        return result
     
-    # Maak gecombineerde markdown content
-    combined_content = create_overview_content(results)
-    combined_content += "\n\n# Geconverteerde Teksten\n\n"
+    # Converteer alle bestanden, begrensd door de grootte van de pool
+    results = list(await asyncio.gather(*(convert_and_report(f) for f in uploaded_files)))
     
-    for i, result in enumerate(results, 1):
-        if result.success:
-            combined_content += f"## {i}. {result.pdf_name}\n\n"
-            combined_content += result.markdown_content + "\n\n"
-            combined_content += "---\n\n"
+    # Maak zip bestand op de gedeelde nabewerking pool, zodat de event loop niet blokkeert
+    try:
+        zip_path = await run_postprocess(create_zip_from_results, results, include_debug, include_images)
+    finally:
+        # Alles wat bewaard moet worden zit nu in de zip; ruim de output directories per PDF op
+        await run_postprocess(cleanup_temp_directories, results)
     
-    # Cleanup (optioneel - kan worden uitgesteld)
-    # cleanup_temp_directories(results)
+    # Maak gecombineerde markdown content (ingekorte preview; de zip bevat de volledige teksten)
+    combined_content = build_combined_preview(
+        results, create_overview_content(results), "\n\n# Geconverteerde Teksten\n\n",
+        "\n\n*… voorbeeld ingekort; het zip bestand bevat de volledige tekst.*\n\n"
+    )
     
     return zip_path, combined_content
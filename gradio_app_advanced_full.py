@@ -5,115 +5,159 @@ Implementeert alle belangrijke Marker library opties met logische indeling.
 
 import gradio as gr
 import traceback
-import asyncio
-from typing import Any
+import logging
+import os
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Dict, Mapping, Tuple
 
 # Import de geünificeerde conversion service
 import conversion_service
 
-def process_pdf(uploaded_files: Any, progress: Any = gr.Progress(track_tqdm=True), *settings_inputs: Any) -> Any:
-    """
-    Een functie voor PDF-conversie met alle geavanceerde instellingen.
-    Ondersteunt nu zowel enkele als meerdere PDF-bestanden.
-    """
-    if uploaded_files is None or len(uploaded_files) == 0:
-        return (
-            "### Upload eerst een of meerdere PDF-bestanden.",
-            "",
-            gr.update(visible=False),
-            gr.update(visible=False),
-            ""
-        )
-    
-    # Normaliseer naar lijst voor consistente verwerking
-    if not isinstance(uploaded_files, list):
-        uploaded_files = [uploaded_files]
+# Logt via de queue-backed handler van conversion_service
+logger = logging.getLogger("conversion_service.gradio")
 
-    # Update UI to show processing state
-    file_count = len(uploaded_files)
-    file_names = [f.name for f in uploaded_files]
-    
-    yield (
-        f"### ⏳ PDF Conversie Gestart\n\n**{file_count} bestand{'en' if file_count > 1 else ''}** worden verwerkt:\n" +
-        "\n".join([f"• {name}" for name in file_names]) +
-        "\n\nDe conversie is begonnen. Dit kan even duren...",
-        "",
-        gr.update(visible=False),
-        gr.update(visible=False),
-        ""
-    )
+# Maximaal aantal wachtende conversies in de Gradio queue; daarboven krijgt de
+# gebruiker direct een melding in plaats van dat uploads zich opstapelen
+MAX_QUEUE_SIZE: int = int(os.getenv("MARKER_MAX_QUEUE", "16"))
+# Grotere uploads weigert Gradio al voordat ze volledig binnen zijn
+MAX_UPLOAD_SIZE: str = os.getenv("MARKER_MAX_UPLOAD", "200mb")
 
-    # --- Verzamel alle instellingen ---
-    keys = [
-        # Basis instellingen
-        "output_format", "page_range", "debug", "output_dir",
-        # OCR instellingen
-        "force_ocr", "strip_existing_ocr", "disable_ocr", "languages",
-        "ocr_space_threshold", "ocr_newline_threshold", "ocr_alphanum_threshold",
-        # LLM instellingen - Provider selectie
-        "use_llm", "llm_provider",
-        # Gemini instellingen
-        "google_api_key", "gemini_model_name",
-        # OpenAI instellingen
-        "openai_api_key", "openai_model_name", "openai_base_url",
-        # Anthropic instellingen
-        "anthropic_api_key", "anthropic_model_name",
-        # Azure instellingen
-        "azure_api_key", "azure_endpoint", "azure_deployment", "azure_api_version",
-        # Ollama instellingen
-        "ollama_base_url", "ollama_model_name",
-        # Custom instellingen
-        "custom_api_key", "custom_base_url", "custom_model_name",
-        # Algemene LLM instellingen
-        "max_retries", "max_concurrency", "timeout", "temperature", "max_tokens",
-        # LLM Functionaliteit
-        "use_llm_layout", "use_llm_table", "use_llm_equation", "use_llm_handwriting",
-        "use_llm_complex_region", "use_llm_form", "use_llm_image_description", 
-        "use_llm_table_merge", "use_llm_text",
-        # LLM Prompts
-        "layout_prompt", "table_prompt", "equation_prompt", "handwriting_prompt",
-        "complex_relabeling_prompt", "table_rewriting_prompt", "table_merge_prompt", "image_description_prompt",
-        # LLM Thresholds & Instellingen
-        "confidence_threshold", "picture_height_threshold", "min_equation_height", "equation_image_expansion_ratio",
-        "max_rows_per_batch", "table_image_expansion_ratio", "table_height_threshold",
-        "table_start_threshold", "vertical_table_height_threshold", "vertical_table_distance_threshold",
-        "horizontal_table_width_threshold", "horizontal_table_distance_threshold", "column_gap_threshold",
-        "image_expansion_ratio",
-        # Layout instellingen
-        "lowres_image_dpi", "highres_image_dpi", "layout_coverage_threshold", "document_ocr_threshold",
-        # Tabel instellingen
-        "detect_boxes", "max_table_rows", "row_split_threshold", "column_gap_ratio",
-        # Performance instellingen
-        "pdftext_workers", "batch_size", "recognition_batch_size", "detection_batch_size",
-        # Output instellingen
-        "extract_images", "paginate_output", "page_separator", "disable_links",
-        # Debug instellingen
-        "debug_layout_images", "debug_pdf_images", "debug_json", "debug_data_folder"
-    ]
+# Volgorde van de instellingen zoals de Gradio inputs ze aanleveren
+SETTINGS_KEYS: Tuple[str, ...] = (
+    # Basis instellingen
+    "output_format", "page_range", "debug", "output_dir",
+    # OCR instellingen
+    "force_ocr", "strip_existing_ocr", "disable_ocr", "languages",
+    "ocr_space_threshold", "ocr_newline_threshold", "ocr_alphanum_threshold",
+    # LLM instellingen - Provider selectie
+    "use_llm", "llm_provider",
+    # Gemini instellingen
+    "google_api_key", "gemini_model_name",
+    # OpenAI instellingen
+    "openai_api_key", "openai_model_name", "openai_base_url",
+    # Anthropic instellingen
+    "anthropic_api_key", "anthropic_model_name",
+    # Azure instellingen
+    "azure_api_key", "azure_endpoint", "azure_deployment", "azure_api_version",
+    # Ollama instellingen
+    "ollama_base_url", "ollama_model_name",
+    # Custom instellingen
+    "custom_api_key", "custom_base_url", "custom_model_name",
+    # Algemene LLM instellingen
+    "max_retries", "max_concurrency", "timeout", "temperature", "max_tokens",
+    # LLM Functionaliteit
+    "use_llm_layout", "use_llm_table", "use_llm_equation", "use_llm_handwriting",
+    "use_llm_complex_region", "use_llm_form", "use_llm_image_description", 
+    "use_llm_table_merge", "use_llm_text",
+    # LLM Prompts
+    "layout_prompt", "table_prompt", "equation_prompt", "handwriting_prompt",
+    "complex_relabeling_prompt", "table_rewriting_prompt", "table_merge_prompt", "image_description_prompt",
+    # LLM Thresholds & Instellingen
+    "confidence_threshold", "picture_height_threshold", "min_equation_height", "equation_image_expansion_ratio",
+    "max_rows_per_batch", "table_image_expansion_ratio", "table_height_threshold",
+    "table_start_threshold", "vertical_table_height_threshold", "vertical_table_distance_threshold",
+    "horizontal_table_width_threshold", "horizontal_table_distance_threshold", "column_gap_threshold",
+    "image_expansion_ratio",
+    # Layout instellingen
+    "lowres_image_dpi", "highres_image_dpi", "layout_coverage_threshold", "document_ocr_threshold",
+    # Tabel instellingen
+    "detect_boxes", "max_table_rows", "row_split_threshold", "column_gap_ratio",
+    # Performance instellingen
+    "pdftext_workers", "batch_size", "recognition_batch_size", "detection_batch_size",
+    # Output instellingen
+    "extract_images", "paginate_output", "page_separator", "disable_links",
+    # ZIP instellingen
+    "include_images_in_zip", "include_debug_in_zip",
+    # Debug instellingen
+    "debug_layout_images", "debug_pdf_images", "debug_json", "debug_data_folder"
+)
+
+# Tekst instellingen waarvan een lege string "niet ingesteld" betekent
+TEXT_SETTINGS: Tuple[str, ...] = (
+    "page_range", "output_dir", "languages", "page_separator", "debug_data_folder",
+    "google_api_key", "gemini_model_name", "openai_api_key", "openai_model_name", "openai_base_url",
+    "anthropic_api_key", "anthropic_model_name", "azure_api_key", "azure_endpoint", 
+    "azure_deployment", "azure_api_version", "ollama_base_url", "ollama_model_name",
+    "custom_api_key", "custom_base_url", "custom_model_name",
+    "layout_prompt", "table_prompt", "equation_prompt", "handwriting_prompt",
+    "complex_relabeling_prompt", "table_rewriting_prompt", "table_merge_prompt", "image_description_prompt"
+)
+
+# Numerieke instellingen (int of float)
+NUMERIC_SETTINGS: Tuple[str, ...] = (
+    "ocr_space_threshold", "ocr_newline_threshold", "ocr_alphanum_threshold", 
+    "layout_coverage_threshold", "document_ocr_threshold", "row_split_threshold", 
+    "column_gap_ratio", "lowres_image_dpi", "highres_image_dpi", "max_table_rows",
+    "pdftext_workers", "max_retries", "max_concurrency", "timeout", "max_tokens",
+    "temperature", "confidence_threshold", "picture_height_threshold", "min_equation_height",
+    "equation_image_expansion_ratio", "max_rows_per_batch", "table_image_expansion_ratio",
+    "table_height_threshold", "table_start_threshold", "vertical_table_height_threshold",
+    "vertical_table_distance_threshold", "horizontal_table_width_threshold",
+    "horizontal_table_distance_threshold", "column_gap_threshold", "image_expansion_ratio"
+)
+
+# Boolean instellingen
+BOOLEAN_SETTINGS: Tuple[str, ...] = (
+    "debug", "force_ocr", "strip_existing_ocr", "disable_ocr", "use_llm", 
+    "detect_boxes", "extract_images", "paginate_output", "disable_links",
+    "debug_layout_images", "debug_pdf_images", "debug_json",
+    "include_images_in_zip", "include_debug_in_zip",
+    "use_llm_layout", "use_llm_table", "use_llm_equation", "use_llm_handwriting",
+    "use_llm_complex_region", "use_llm_form", "use_llm_image_description", 
+    "use_llm_table_merge", "use_llm_text"
+)
+
+# Instellingen per LLM provider; die van niet-geselecteerde providers worden verwijderd
+PROVIDER_SETTINGS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "gemini": ("google_api_key", "gemini_model_name"),
+    "openai": ("openai_api_key", "openai_model_name", "openai_base_url"),
+    "anthropic": ("anthropic_api_key", "anthropic_model_name"),
+    "azure": ("azure_api_key", "azure_endpoint", "azure_deployment", "azure_api_version"),
+    "ollama": ("ollama_base_url", "ollama_model_name"),
+    "custom": ("custom_api_key", "custom_base_url", "custom_model_name"),
+})
+
+# Instellingen die alleen betekenis hebben als LLM gebruikt wordt
+LLM_SPECIFIC_SETTINGS: Tuple[str, ...] = (
+    "llm_provider", "google_api_key", "gemini_model_name",
+    "openai_api_key", "openai_model_name", "openai_base_url",
+    "anthropic_api_key", "anthropic_model_name",
+    "azure_api_key", "azure_endpoint", "azure_deployment", "azure_api_version",
+    "ollama_base_url", "ollama_model_name",
+    "custom_api_key", "custom_base_url", "custom_model_name",
+    "max_retries", "max_concurrency", "timeout", "temperature", "max_tokens",
+    "use_llm_layout", "use_llm_table", "use_llm_equation", "use_llm_handwriting",
+    "use_llm_complex_region", "use_llm_form", "use_llm_image_description", 
+    "use_llm_table_merge", "use_llm_text",
+    "layout_prompt", "table_prompt", "equation_prompt", "handwriting_prompt",
+    "complex_relabeling_prompt", "table_rewriting_prompt", "table_merge_prompt", "image_description_prompt",
+    "confidence_threshold", "picture_height_threshold", "min_equation_height", "equation_image_expansion_ratio",
+    "max_rows_per_batch", "table_image_expansion_ratio", "table_height_threshold",
+    "table_start_threshold", "vertical_table_height_threshold", "vertical_table_distance_threshold",
+    "horizontal_table_width_threshold", "horizontal_table_distance_threshold", "column_gap_threshold",
+    "image_expansion_ratio"
+)
+
+def _normalize_settings(settings_inputs: Tuple[Any, ...]) -> Dict[str, Any]:
+    """
+    Zet de ruwe waarden van de Gradio inputs om naar conversie instellingen.
     
-    settings = dict(zip(keys, settings_inputs))
+    Args:
+        settings_inputs: Waarden in de volgorde van SETTINGS_KEYS
+        
+    Returns:
+        Instellingen met getypeerde waarden, zonder die van niet-geselecteerde
+        LLM providers (of alle LLM instellingen als LLM uit staat)
+    """
+    settings = dict(zip(SETTINGS_KEYS, settings_inputs))
     
     # Verwerk lege strings en None waarden
-    for key in ["page_range", "output_dir", "languages", "page_separator", "debug_data_folder",
-                "google_api_key", "gemini_model_name", "openai_api_key", "openai_model_name", "openai_base_url",
-                "anthropic_api_key", "anthropic_model_name", "azure_api_key", "azure_endpoint", 
-                "azure_deployment", "azure_api_version", "ollama_base_url", "ollama_model_name",
-                "custom_api_key", "custom_base_url", "custom_model_name",
-                "layout_prompt", "table_prompt", "equation_prompt", "handwriting_prompt",
-                "complex_relabeling_prompt", "table_rewriting_prompt", "table_merge_prompt", "image_description_prompt"]:
+    for key in TEXT_SETTINGS:
         if settings[key] == "":
             settings[key] = None
     
     # Converteer numerieke waarden
-    for key in ["ocr_space_threshold", "ocr_newline_threshold", "ocr_alphanum_threshold", 
-                "layout_coverage_threshold", "document_ocr_threshold", "row_split_threshold", 
-                "column_gap_ratio", "lowres_image_dpi", "highres_image_dpi", "max_table_rows",
-                "pdftext_workers", "max_retries", "max_concurrency", "timeout", "max_tokens",
-                "temperature", "confidence_threshold", "picture_height_threshold", "min_equation_height",
-                "equation_image_expansion_ratio", "max_rows_per_batch", "table_image_expansion_ratio",
-                "table_height_threshold", "table_start_threshold", "vertical_table_height_threshold",
-                "vertical_table_distance_threshold", "horizontal_table_width_threshold",
-                "horizontal_table_distance_threshold", "column_gap_threshold", "image_expansion_ratio"]:
+    for key in NUMERIC_SETTINGS:
         if settings[key] is None or settings[key] == "":
             settings[key] = None
         else:
@@ -124,86 +168,66 @@ def process_pdf(uploaded_files: Any, progress: Any = gr.Progress(track_tqdm=True
     
     # KRITIEK: Forceer pdftext_workers altijd op 1 voor stabiliteit
     settings["pdftext_workers"] = 1
-    print("🔒 Forced pdftext_workers to 1 for stability")
+    logger.debug("🔒 Forced pdftext_workers to 1 for stability")
     
     # Converteer boolean waarden
-    for key in ["debug", "force_ocr", "strip_existing_ocr", "disable_ocr", "use_llm", 
-                "detect_boxes", "extract_images", "paginate_output", "disable_links",
-                "debug_layout_images", "debug_pdf_images", "debug_json",
-                "use_llm_layout", "use_llm_table", "use_llm_equation", "use_llm_handwriting",
-                "use_llm_complex_region", "use_llm_form", "use_llm_image_description", 
-                "use_llm_table_merge", "use_llm_text"]:
+    for key in BOOLEAN_SETTINGS:
         settings[key] = bool(settings[key])
     
     # Converteer talen naar lijst
     if settings["languages"] and isinstance(settings["languages"], str):
         settings["languages"] = [lang.strip() for lang in settings["languages"].split(',')]
 
-    # Filter LLM instellingen op basis van geselecteerde provider
-    llm_provider = settings.get("llm_provider", "gemini")
-    use_llm = settings.get("use_llm", False)
-    
     # Verwijder LLM instellingen van niet-geselecteerde providers
-    providers = ["gemini", "openai", "anthropic", "azure", "ollama", "custom"]
-    for provider in providers:
-        if provider != llm_provider:
-            # Verwijder API keys en instellingen van andere providers
-            if provider == "gemini":
-                settings.pop("google_api_key", None)
-                settings.pop("gemini_model_name", None)
-            elif provider == "openai":
-                settings.pop("openai_api_key", None)
-                settings.pop("openai_model_name", None)
-                settings.pop("openai_base_url", None)
-            elif provider == "anthropic":
-                settings.pop("anthropic_api_key", None)
-                settings.pop("anthropic_model_name", None)
-            elif provider == "azure":
-                settings.pop("azure_api_key", None)
-                settings.pop("azure_endpoint", None)
-                settings.pop("azure_deployment", None)
-                settings.pop("azure_api_version", None)
-            elif provider == "ollama":
-                settings.pop("ollama_base_url", None)
-                settings.pop("ollama_model_name", None)
-            elif provider == "custom":
-                settings.pop("custom_api_key", None)
-                settings.pop("custom_base_url", None)
-                settings.pop("custom_model_name", None)
+    for provider, provider_keys in PROVIDER_SETTINGS.items():
+        if provider != settings.get("llm_provider", "gemini"):
+            for key in provider_keys:
+                settings.pop(key, None)
     
     # Als LLM niet gebruikt wordt, verwijder alle LLM-specifieke instellingen
-    if not use_llm:
-        llm_specific_keys = [
-            "llm_provider", "google_api_key", "gemini_model_name",
-            "openai_api_key", "openai_model_name", "openai_base_url",
-            "anthropic_api_key", "anthropic_model_name",
-            "azure_api_key", "azure_endpoint", "azure_deployment", "azure_api_version",
-            "ollama_base_url", "ollama_model_name",
-            "custom_api_key", "custom_base_url", "custom_model_name",
-            "max_retries", "max_concurrency", "timeout", "temperature", "max_tokens",
-            "use_llm_layout", "use_llm_table", "use_llm_equation", "use_llm_handwriting",
-            "use_llm_complex_region", "use_llm_form", "use_llm_image_description", 
-            "use_llm_table_merge", "use_llm_text",
-            "layout_prompt", "table_prompt", "equation_prompt", "handwriting_prompt",
-            "complex_relabeling_prompt", "table_rewriting_prompt", "table_merge_prompt", "image_description_prompt",
-            "confidence_threshold", "picture_height_threshold", "min_equation_height", "equation_image_expansion_ratio",
-            "max_rows_per_batch", "table_image_expansion_ratio", "table_height_threshold",
-            "table_start_threshold", "vertical_table_height_threshold", "vertical_table_distance_threshold",
-            "horizontal_table_width_threshold", "horizontal_table_distance_threshold", "column_gap_threshold",
-            "image_expansion_ratio"
-        ]
-        for key in llm_specific_keys:
+    if not settings.get("use_llm", False):
+        for key in LLM_SPECIFIC_SETTINGS:
             settings.pop(key, None)
+    
+    return settings
 
-    print(f"🔍 Debug: Starting batch conversion for {file_count} files")
-    print(f"🔍 Debug: LLM Provider: {llm_provider}, Use LLM: {use_llm}")
-    print(f"🔍 Debug: Settings count after filtering: {len(settings)}")
-    print("🔍 Debug: Key settings:")
-    for key, value in settings.items():
-        if value is not None and value != "" and value:
-            print(f"  {key}: {value}")
+async def process_pdf(uploaded_files: Any, progress: Any = gr.Progress(track_tqdm=True), *settings_inputs: Any) -> AsyncIterator[Any]:
+    """
+    Een functie voor PDF-conversie met alle geavanceerde instellingen.
+    Ondersteunt nu zowel enkele als meerdere PDF-bestanden.
+    """
+    if uploaded_files is None or len(uploaded_files) == 0:
+        yield (
+            "### Upload eerst een of meerdere PDF-bestanden.",
+            "",
+            gr.update(visible=False),
+            gr.update(visible=False),
+            ""
+        )
+        return
+    
+    # Normaliseer naar een lijst van paden voor consistente verwerking
+    if not isinstance(uploaded_files, list):
+        uploaded_files = [uploaded_files]
+    uploaded_files = [str(f) for f in uploaded_files]
+
+    file_count = len(uploaded_files)
+    file_names = [os.path.basename(f) for f in uploaded_files]
+
+    # --- Verzamel alle instellingen ---
+    settings = _normalize_settings(settings_inputs)
+    llm_provider = settings.get("llm_provider", "gemini")
+    use_llm = settings.get("use_llm", False)
+
+    # Het instellingen overzicht wordt alleen opgebouwd als debug logging aan staat
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "🔍 Starting batch conversion for %d files (LLM Provider: %s, Use LLM: %s, %d settings)\n%s",
+            file_count, llm_provider, use_llm, len(settings),
+            "\n".join(f"  {key}: {value}" for key, value in settings.items() if value),
+        )
     
-    # Update UI to show detailed processing
+    # Eén statusupdate met bestanden en instellingen, in plaats van twee vlak na elkaar
     llm_info = "Nee"
     if use_llm:
         provider_name = llm_provider.title()
@@ -226,6 +250,7 @@ def process_pdf(uploaded_files: Any, progress: Any = gr.Progress(track_tqdm=True
     yield (
         "### 🔄 PDF Conversie in Uitvoering\n\n" +
         f"**Bestanden:** {file_count} bestand{'en' if file_count > 1 else ''}\n" +
+        "\n".join([f"• {name}" for name in file_names]) + "\n\n" +
         f"**Output Formaat:** {settings.get('output_format', 'markdown')}\n" +
         f"**LLM Gebruik:** {llm_info}\n" +
         f"**OCR:** {'Geforceerd' if settings.get('force_ocr') else 'Automatisch'}\n" +
@@ -238,46 +263,32 @@ def process_pdf(uploaded_files: Any, progress: Any = gr.Progress(track_tqdm=True
     )
     
     try:
-        # Run the async function in a new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
         progress(0.1, desc="Conversie gestart...")
         
-        # Debug: Print uploaded files info
-        print(f"🔍 Debug: Uploaded files count: {len(uploaded_files)}")
-        for i, file in enumerate(uploaded_files):
-            print(f"🔍 Debug: File {i}: {type(file)} - {getattr(file, 'name', 'no name')} - {getattr(file, 'path', 'no path')}")
+        # Debug: Log uploaded files info
+        for i, file_path in enumerate(uploaded_files):
+            logger.debug("🔍 File %d: %s", i, file_path)
         
-        # Gebruik de nieuwe zip-enabled conversion service
-        zip_path, combined_content = loop.run_until_complete(
-            conversion_service.convert_multiple_pdfs_with_zip(
-                uploaded_files, 
-                settings,
-                include_debug=settings.get("include_debug_in_zip", False),
-                include_images=settings.get("include_images_in_zip", True)
-            )
-        )
+        def report_progress(finished: int, total: int) -> None:
+            # Elk geconverteerd bestand schuift de balk op tussen 10% en 90%
+            progress(0.1 + 0.8 * finished / total, desc=f"{finished}/{total} bestanden geconverteerd...")
         
-        loop.close()
+        # Gebruik de zip-enabled conversion service direct op de event loop van Gradio;
+        # het zware werk draait op de worker pools van de service
+        zip_path, combined_content = await conversion_service.convert_multiple_pdfs_with_zip(
+            uploaded_files, 
+            settings,
+            include_debug=settings.get("include_debug_in_zip", False),
+            include_images=settings.get("include_images_in_zip", True),
+            progress_callback=report_progress
+        )
         
         progress(0.9, desc="Conversie voltooid, verwerken van resultaat...")
         
-        print(f"🔍 Debug: Conversion completed, zip created: {zip_path}")
+        logger.debug("🔍 Conversion completed, zip created: %s", zip_path)
         
         progress(1.0, desc="Conversie succesvol voltooid!")
         
-        # Update status message
-        status_message = "### ✅ Conversie Voltooid\n\n"
-        status_message += f"**{file_count}** bestand{'en' if file_count > 1 else ''} succesvol geconverteerd.\n\n"
-        status_message += "Alle gegenereerde bestanden zijn opgeslagen in het ZIP-bestand, inclusief:\n"
-        status_message += "• Geconverteerde tekst (Markdown/HTML/JSON)\n"
-        if settings.get("include_images_in_zip", True):
-            status_message += "• Geëxtraheerde afbeeldingen\n"
-        if settings.get("include_debug_in_zip", False):
-            status_message += "• Debug bestanden en afbeeldingen\n"
-        status_message += "\nDownload het ZIP-bestand om alle bestanden te bekijken."
-        
         yield (
             combined_content,
             combined_content,
@@ -288,9 +299,8 @@ def process_pdf(uploaded_files: Any, progress: Any = gr.Progress(track_tqdm=True
         
     except Exception as e:
         # --- Zet UI in "Fout"-staat ---
-        print(f"🔍 Debug: Error occurred: {e}")
         tb_str = traceback.format_exc()
-        print(f"🔍 Debug: Traceback: {tb_str}")
+        logger.error("❌ Conversion failed: %s\n%s", e, tb_str)
         
         error_message = f"### ❌ Conversie Mislukt\n\nEr is een onverwachte fout opgetreden: {e}"
         yield (
@@ -310,10 +320,12 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Geavanceerde PDF Converter") as de
 
     with gr.Row():
         with gr.Column(scale=1):
+            # Gradio streamt uploads naar schijf (GRADIO_TEMP_DIR) en geeft alleen de paden door
             file_input = gr.File(
                 label="Upload PDF(s)", 
                 file_types=['.pdf'],
-                file_count="multiple"
+                file_count="multiple",
+                type="filepath"
             )
             
             with gr.Accordion("⚙️ Basis Instellingen", open=True) as basic_settings:
@@ -927,12 +939,19 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Geavanceerde PDF Converter") as de
         debug_layout_images, debug_pdf_images, debug_json, debug_data_folder
     ]
 
-    # Bind de functie aan de convert button
+    # Bind de functie aan de convert button. Gradio laat standaard maar één klik
+    # tegelijk door; de conversion service begrenst zelf de pipelines, dus zoveel
+    # klikken als er pipelines zijn mogen tegelijk lopen.
     convert_button.click(
         fn=process_pdf,
         inputs=[file_input] + settings_components,  # type: ignore
-        outputs=[output_markdown, output_raw, download_button, error_accordion, error_details]
+        outputs=[output_markdown, output_raw, download_button, error_accordion, error_details],
+        concurrency_limit=conversion_service.MAX_CONCURRENCY
     )
 
 if __name__ == "__main__":
-    demo.launch(show_api=True, show_error=True)
+    # ZIP resultaten worden direct vanuit hun map geserveerd (FileResponse/sendfile),
+    # zonder dat Gradio ze eerst hasht en naar zijn eigen cache kopieert
+    gr.set_static_paths(paths=[conversion_service.get_zip_dir()])
+    demo.queue(max_size=MAX_QUEUE_SIZE)
+    demo.launch(show_api=True, show_error=True, max_file_size=MAX_UPLOAD_SIZE)
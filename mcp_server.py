@@ -6,11 +6,20 @@ It exposes the PDF conversion functionality as a discoverable MCP tool that
 AI agents can use to convert PDF documents to Markdown format.
 """
 
+import asyncio
+import functools
+import importlib.util
+import logging
+
+import anyio
 from fastmcp import FastMCP
 
 
 import conversion_service
 
+# Log through the conversion service's queue-backed handler
+logger = logging.getLogger("conversion_service.mcp")
+
 # Instantiate the FastMCP server with a descriptive name
 mcp = FastMCP(name="PDF to Markdown Conversion Service")
 
@@ -44,7 +53,7 @@ async def convert_pdf_to_markdown(pdf_file_content: bytes) -> str:
     except Exception as e:
         # FastMCP will automatically catch this exception and return a
         # standard MCP Error message to the client.
-        print(f"❌ Error in MCP tool execution: {e}")
+        logger.exception("❌ Error in MCP tool execution: %s", e)
         raise
 
 @mcp.tool
@@ -78,60 +87,55 @@ async def convert_multiple_pdfs_to_markdown(pdf_files: list[dict]) -> dict:
         RuntimeError: If the Marker converter is not available.
         Exception: If batch processing fails for any reason.
     """
-    try:
-        results = []
-        successful = 0
-        failed = 0
-        
-        for pdf_file in pdf_files:
-            try:
-                filename = pdf_file.get('filename', 'unknown.pdf')
-                content = pdf_file.get('content', b'')
-                
-                if not content:
-                    results.append({
-                        'filename': filename,
-                        'success': False,
-                        'content': None,
-                        'error': 'No content provided'
-                    })
-                    failed += 1
-                    continue
-                
-                # Convert single PDF
-                markdown_text = await conversion_service.convert_pdf_bytes_to_markdown(
-                    content, {"output_format": "markdown"}
-                )
-                
-                results.append({
-                    'filename': filename,
-                    'success': True,
-                    'content': markdown_text,
-                    'error': None
-                })
-                successful += 1
-                
-            except Exception as e:
-                filename = pdf_file.get('filename', 'unknown.pdf')
-                results.append({
+    async def convert_one(pdf_file: dict) -> dict:
+        filename = pdf_file.get('filename', 'unknown.pdf')
+        try:
+            content = pdf_file.get('content', b'')
+            
+            if not content:
+                return {
                     'filename': filename,
                     'success': False,
                     'content': None,
-                    'error': str(e)
-                })
-                failed += 1
+                    'error': 'No content provided'
+                }
+            
+            # Convert single PDF
+            markdown_text = await conversion_service.convert_pdf_bytes_to_markdown(
+                content, {"output_format": "markdown"}
+            )
+            
+            return {
+                'filename': filename,
+                'success': True,
+                'content': markdown_text,
+                'error': None
+            }
+            
+        except Exception as e:
+            return {
+                'filename': filename,
+                'success': False,
+                'content': None,
+                'error': str(e)
+            }
+    
+    try:
+        # Submit the whole batch at once; the conversion pool bounds concurrency
+        results = list(await asyncio.gather(*(convert_one(pdf_file) for pdf_file in pdf_files)))
+        successful = sum(1 for r in results if r['success'])
         
         return {
             'results': results,
             'summary': {
                 'total': len(pdf_files),
                 'successful': successful,
-                'failed': failed
+                'failed': len(results) - successful
             }
         }
         
     except Exception as e:
-        print(f"❌ Error in batch MCP tool execution: {e}")
+        logger.exception("❌ Error in batch MCP tool execution: %s", e)
         raise
 
 @mcp.tool
@@ -161,5 +165,13 @@ if __name__ == "__main__":
     print("   - get_converter_status: Check converter initialization status")
     print()
     
-    # Run with HTTP transport for easier testing
-    mcp.run(transport="http", port=8000)
+    # Worker processes (MARKER_PROCESS_WORKERS) load their models while the server starts
+    conversion_service.start_process_workers()
+
+    # Run with HTTP transport for easier testing. Same as mcp.run(), but on
+    # uvloop when it is installed. mcp.run() starts uvicorn inside an anyio
+    # loop, where uvicorn's own loop="auto" selection does not apply.
+    anyio.run(
+        functools.partial(mcp.run_async, transport="http", port=8000),
+        backend_options={"use_uvloop": importlib.util.find_spec("uvloop") is not None},
+    )
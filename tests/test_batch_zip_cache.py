@@ -0,0 +1,141 @@
+"""
+Tests for the batch zip cache and the zip retention of the conversion service.
+
+Marker itself is replaced by a fake inference stage, so these tests run
+without models.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+# Add parent directory to path to import conversion_service
+sys.path.append(str(Path(__file__).parent.parent))
+
+import conversion_service
+from conversion_service import ConversionResult
+
+
+@pytest.fixture
+def fake_conversions(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Replace the Marker stage and record which PDFs were converted."""
+    converted: List[str] = []
+
+    async def convert(pdf_path: str, settings: dict) -> ConversionResult:
+        converted.append(pdf_path)
+        result = ConversionResult(os.path.basename(pdf_path))
+        result.markdown_content = f"text of {result.pdf_name}"
+        result.success = not result.pdf_name.startswith("broken")
+        return result
+
+    monkeypatch.setattr(conversion_service, "convert_pdf_with_zip_output", convert)
+    monkeypatch.setattr(conversion_service, "schedule_prefetch", lambda pdf_path: None)
+    monkeypatch.setattr(conversion_service, "_BATCH_CACHE", type(conversion_service._BATCH_CACHE)())
+    return converted
+
+
+def _write_pdf(path: Path, content: bytes) -> str:
+    path.write_bytes(content)
+    return str(path)
+
+
+def _convert(paths: List[str], settings: dict, **kwargs: Any) -> tuple:
+    return asyncio.run(conversion_service.convert_multiple_pdfs_with_zip(paths, settings, **kwargs))
+
+
+def test_same_upload_reuses_zip(tmp_path: Path, fake_conversions: List[str]) -> None:
+    pdf = _write_pdf(tmp_path / "a.pdf", b"%PDF-1.4 a")
+    first = _convert([pdf], {})
+    second = _convert([pdf], {})
+    assert second == first
+    assert fake_conversions == [pdf]
+
+
+def test_reuse_reports_progress(tmp_path: Path, fake_conversions: List[str]) -> None:
+    pdf = _write_pdf(tmp_path / "a.pdf", b"%PDF-1.4 a")
+    _convert([pdf], {})
+    progress: List[tuple] = []
+    _convert([pdf], {}, progress_callback=lambda done, total: progress.append((done, total)))
+    assert progress == [(1, 1)]
+
+
+def test_key_covers_content_name_settings_and_options(tmp_path: Path, fake_conversions: List[str]) -> None:
+    pdf = _write_pdf(tmp_path / "a.pdf", b"%PDF-1.4 a")
+    renamed = _write_pdf(tmp_path / "b.pdf", b"%PDF-1.4 a")
+    zip_paths = {
+        _convert([pdf], {})[0],
+        _convert([renamed], {})[0],
+        _convert([pdf], {"force_ocr": True})[0],
+        _convert([pdf], {}, include_images=False)[0],
+    }
+    _write_pdf(tmp_path / "a.pdf", b"%PDF-1.4 changed")
+    zip_paths.add(_convert([pdf], {})[0])
+    assert len(zip_paths) == 5
+    assert len(fake_conversions) == 5
+
+
+def test_marker_defaults_share_a_key(tmp_path: Path, fake_conversions: List[str]) -> None:
+    pdf = _write_pdf(tmp_path / "a.pdf", b"%PDF-1.4 a")
+    first = _convert([pdf], {})
+    assert _convert([pdf], {"output_format": "markdown", "page_range": None}) == first
+    assert len(fake_conversions) == 1
+
+
+def test_failed_batches_are_not_reused(tmp_path: Path, fake_conversions: List[str]) -> None:
+    pdf = _write_pdf(tmp_path / "broken.pdf", b"%PDF-1.4 broken")
+    _convert([pdf], {})
+    _convert([pdf], {})
+    assert len(fake_conversions) == 2
+
+
+def test_evicted_zip_is_not_reused(tmp_path: Path, fake_conversions: List[str],
+                                   monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "ZIP_KEEP", 2)
+    pdfs = [_write_pdf(tmp_path / f"{name}.pdf", name.encode()) for name in "abc"]
+    first_zip = _convert([pdfs[0]], {})[0]
+    _convert([pdfs[1]], {})
+    _convert([pdfs[2]], {})
+    assert not os.path.exists(first_zip)
+
+    _convert([pdfs[0]], {})
+    assert fake_conversions.count(pdfs[0]) == 2
+    assert len(conversion_service._BATCH_CACHE) <= 2
+
+
+def test_reuse_protects_zip_from_eviction(tmp_path: Path, fake_conversions: List[str],
+                                          monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "ZIP_KEEP", 2)
+    pdfs = [_write_pdf(tmp_path / f"{name}.pdf", name.encode()) for name in "abc"]
+    first_zip = _convert([pdfs[0]], {})[0]
+    _convert([pdfs[1]], {})
+    # Reusing the first zip makes the second one the oldest
+    assert _convert([pdfs[0]], {})[0] == first_zip
+    _convert([pdfs[2]], {})
+    assert os.path.exists(first_zip)
+    assert fake_conversions.count(pdfs[0]) == 1
+
+
+def test_missing_upload_skips_the_cache(tmp_path: Path, fake_conversions: List[str]) -> None:
+    missing = str(tmp_path / "missing.pdf")
+    _convert([missing], {})
+    assert fake_conversions == [missing]
+
+
+def test_uploaded_file_path_accepts_objects_and_paths(tmp_path: Path) -> None:
+    class Named:
+        name = tmp_path / "named.pdf"
+
+    class WithPath:
+        path = "upload.pdf"
+
+    assert conversion_service._uploaded_file_path(Named()) == str(tmp_path / "named.pdf")
+    assert conversion_service._uploaded_file_path(WithPath()) == "upload.pdf"
+    assert conversion_service._uploaded_file_path(tmp_path / "p.pdf") == str(tmp_path / "p.pdf")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
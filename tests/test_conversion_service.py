@@ -0,0 +1,373 @@
+"""
+Unit tests for the helpers of the conversion service.
+
+Marker itself is replaced by fakes, so these tests run without models.
+"""
+
+import asyncio
+import io
+import os
+import sys
+import threading
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Hashable, List, Tuple
+
+import pytest
+
+# Add parent directory to path to import conversion_service
+sys.path.append(str(Path(__file__).parent.parent))
+
+import conversion_service
+from conversion_service import ConversionResult
+
+
+class FakeConverter:
+    """Stands in for PdfConverter and records how it was built."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.kwargs = kwargs
+
+
+@pytest.fixture
+def converter_pool(monkeypatch: pytest.MonkeyPatch) -> "OrderedDict[Any, List[Any]]":
+    """Give every test an empty converter pool and a fake Marker."""
+    pool: "OrderedDict[Any, List[Any]]" = OrderedDict()
+    monkeypatch.setattr(conversion_service, "_IDLE_CONVERTERS", pool)
+    monkeypatch.setattr(conversion_service, "load_models", lambda: {"models": True})
+    monkeypatch.setattr(conversion_service, "load_marker", lambda: SimpleNamespace(PdfConverter=FakeConverter))
+    return pool
+
+
+@pytest.fixture
+def result_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> "OrderedDict[Any, str]":
+    """Give every test an empty result cache of two entries, persisted below tmp_path."""
+    cache: "OrderedDict[Any, str]" = OrderedDict()
+    monkeypatch.setattr(conversion_service, "_RESULT_CACHE", cache)
+    monkeypatch.setattr(conversion_service, "RESULT_CACHE_SIZE", 2)
+    monkeypatch.setattr(conversion_service, "RESULT_CACHE_DIR", str(tmp_path / "cache"))
+    return cache
+
+
+def _result(pdf_name: str, markdown_content: str = "", success: bool = True) -> ConversionResult:
+    result = ConversionResult(pdf_name)
+    result.markdown_content = markdown_content
+    result.success = success
+    return result
+
+
+def _cache_key(pdf_bytes: bytes, settings: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, Hashable], ...]]:
+    key = conversion_service._result_cache_key(pdf_bytes, settings)
+    assert key is not None
+    return key
+
+
+# --- Converter pool ---
+
+def test_settings_key_drops_defaults_and_none() -> None:
+    key = conversion_service._settings_key({"output_format": "markdown", "page_range": None, "force_ocr": True})
+    assert key == (("force_ocr", True),)
+    assert conversion_service._settings_key({}) == ()
+
+
+def test_settings_key_is_order_independent_and_hashable() -> None:
+    first = conversion_service._settings_key({"languages": ["en", "nl"], "extra": {"a": 1}, "force_ocr": True})
+    second = conversion_service._settings_key({"force_ocr": True, "extra": {"a": 1}, "languages": ["en", "nl"]})
+    assert first == second
+    assert dict(first)["languages"] == ("en", "nl")
+    assert dict(first)["extra"] == ("<repr>", repr({"a": 1}))
+    hash(first)
+
+
+def test_lend_converter_reuses_returned_instances(converter_pool: "OrderedDict[Any, List[Any]]") -> None:
+    with conversion_service.lend_converter("key", FakeConverter) as first:
+        pass
+    with conversion_service.lend_converter("key", FakeConverter) as second:
+        # Lent out, so a concurrent conversion gets its own instance
+        with conversion_service.lend_converter("key", FakeConverter) as concurrent:
+            assert concurrent is not second
+    assert second is first
+
+
+def test_lend_converter_discards_after_failure(converter_pool: "OrderedDict[Any, List[Any]]") -> None:
+    with pytest.raises(ValueError):
+        with conversion_service.lend_converter("key", FakeConverter) as failed:
+            raise ValueError("conversion failed")
+    with conversion_service.lend_converter("key", FakeConverter) as converter:
+        assert converter is not failed
+
+
+def test_lend_converter_without_key_is_not_pooled(converter_pool: "OrderedDict[Any, List[Any]]") -> None:
+    with conversion_service.lend_converter(None, FakeConverter) as first:
+        pass
+    with conversion_service.lend_converter(None, FakeConverter) as second:
+        assert second is not first
+    assert not converter_pool
+
+
+def test_lend_converter_evicts_least_recently_used_key(converter_pool: "OrderedDict[Any, List[Any]]",
+                                                       monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "CONVERTER_CACHE_SIZE", 2)
+    for key in ("a", "b", "a", "c"):
+        with conversion_service.lend_converter(key, FakeConverter):
+            pass
+    assert list(converter_pool) == ["a", "c"]
+
+
+def test_checkout_converter_shares_default_settings(converter_pool: "OrderedDict[Any, List[Any]]") -> None:
+    with conversion_service.checkout_converter() as default:
+        assert default.kwargs == {"artifact_dict": {"models": True}}
+    with conversion_service.checkout_converter({"output_format": "markdown"}) as same:
+        assert same is default
+    with conversion_service.checkout_converter({"force_ocr": True, "page_range": None}) as ocr:
+        assert ocr is not default
+        assert ocr.kwargs["config"] == {"force_ocr": True}
+
+
+def test_output_converter_key_ignores_output_paths() -> None:
+    first = conversion_service.output_converter_key({"force_ocr": True, "output_dir": "/a", "debug_data_folder": "/a/d"})
+    second = conversion_service.output_converter_key({"force_ocr": True, "output_dir": "/b", "debug_data_folder": "/b/d"})
+    assert first == second
+    assert first != conversion_service.output_converter_key({"output_dir": "/a"})
+    assert conversion_service.output_converter_key({"output_dir": "/a", "debug_json": True}) is None
+
+
+# --- Result cache ---
+
+def test_result_cache_is_lru(result_cache: "OrderedDict[Any, str]",
+                             monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "RESULT_CACHE_DIR", None)
+    keys = [_cache_key(name.encode(), {}) for name in "abc"]
+    conversion_service._result_cache_put(keys[0], "a")
+    conversion_service._result_cache_put(keys[1], "b")
+    assert conversion_service._result_cache_get(keys[0]) == "a"
+    conversion_service._result_cache_put(keys[2], "c")
+    assert conversion_service._result_cache_get(keys[1]) is None
+    assert list(result_cache.values()) == ["a", "c"]
+
+
+def test_result_cache_key_covers_content_and_settings(result_cache: "OrderedDict[Any, str]") -> None:
+    key = conversion_service._result_cache_key(b"%PDF a", {})
+    assert key == conversion_service._result_cache_key(b"%PDF a", {"output_format": "markdown"})
+    assert key != conversion_service._result_cache_key(b"%PDF b", {})
+    assert key != conversion_service._result_cache_key(b"%PDF a", {"force_ocr": True})
+
+
+def test_result_cache_key_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "RESULT_CACHE_SIZE", 0)
+    monkeypatch.setattr(conversion_service, "RESULT_CACHE_DIR", None)
+    assert conversion_service._result_cache_key(b"%PDF a", {}) is None
+
+
+def test_result_cache_persists_to_disk(result_cache: "OrderedDict[Any, str]", tmp_path: Path) -> None:
+    key = _cache_key(b"%PDF a", {})
+    conversion_service._result_cache_put(key, "tekst ✓ 文")
+    result_cache.clear()
+    assert conversion_service._result_cache_get(key) == "tekst ✓ 文"
+    assert key in result_cache
+    assert [path.suffix for path in (tmp_path / "cache").iterdir()] == [".md"]
+
+
+def test_result_cache_ignores_unreadable_entries(result_cache: "OrderedDict[Any, str]") -> None:
+    key = _cache_key(b"%PDF a", {})
+    cache_path = conversion_service._result_cache_path(key)
+    assert cache_path is not None
+    os.makedirs(os.path.dirname(cache_path))
+    Path(cache_path).write_bytes(b"\xff\xfe")
+    assert conversion_service._result_cache_get(key) is None
+
+
+# --- Process pool ---
+
+def test_process_jobs_do_not_hold_conversion_threads(result_cache: "OrderedDict[Any, str]",
+                                                     monkeypatch: pytest.MonkeyPatch) -> None:
+    workers = 3
+    # Every stub job waits until all worker "processes" are busy at the same time
+    all_busy = threading.Barrier(workers, timeout=5)
+
+    def convert_path(pdf_path: str, settings: dict) -> str:
+        all_busy.wait()
+        return Path(pdf_path).read_text()
+
+    process_pool = ThreadPoolExecutor(max_workers=workers)
+    monkeypatch.setattr(conversion_service, "RESULT_CACHE_SIZE", workers)
+    monkeypatch.setattr(conversion_service, "PROCESS_WORKERS", workers)
+    monkeypatch.setattr(conversion_service, "MAX_PENDING_CONVERSIONS", 2 * workers)
+    monkeypatch.setattr(conversion_service, "_EXECUTOR", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(conversion_service, "_process_executor", lambda: process_pool)
+    monkeypatch.setattr(conversion_service, "_convert_path", convert_path)
+
+    async def convert_all() -> List[str]:
+        return list(await asyncio.gather(*(
+            conversion_service.convert_pdf_bytes_to_markdown(f"pdf {i}".encode()) for i in range(workers)
+        )))
+
+    try:
+        assert asyncio.run(convert_all()) == [f"pdf {i}" for i in range(workers)]
+        # The results are cached by the parent as before
+        assert sorted(result_cache.values()) == [f"pdf {i}" for i in range(workers)]
+    finally:
+        process_pool.shutdown()
+
+
+# --- Zip retention ---
+
+def test_retain_zip_deletes_oldest(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "ZIP_KEEP", 2)
+    monkeypatch.setattr(conversion_service, "_RECENT_ZIPS", deque())
+    zip_paths = [tmp_path / f"{name}.zip" for name in "abc"]
+    for zip_path in zip_paths:
+        zip_path.touch()
+        conversion_service._retain_zip(str(zip_path))
+    assert [zip_path.exists() for zip_path in zip_paths] == [False, True, True]
+    assert list(conversion_service._RECENT_ZIPS) == [str(zip_paths[1]), str(zip_paths[2])]
+
+
+def test_retain_zip_tolerates_removed_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "ZIP_KEEP", 1)
+    monkeypatch.setattr(conversion_service, "_RECENT_ZIPS", deque())
+    conversion_service._retain_zip(str(tmp_path / "gone.zip"))
+    conversion_service._retain_zip(str(tmp_path / "next.zip"))
+    assert list(conversion_service._RECENT_ZIPS) == [str(tmp_path / "next.zip")]
+
+
+def test_create_zip_from_results_is_retained(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "_RECENT_ZIPS", deque())
+    zip_path = conversion_service.create_zip_from_results([_result("a.pdf", "text")])
+    try:
+        assert os.path.dirname(zip_path) == conversion_service.get_zip_dir()
+        assert list(conversion_service._RECENT_ZIPS) == [zip_path]
+    finally:
+        os.unlink(zip_path)
+
+
+# --- Output files and zip contents ---
+
+def _output_tree(root: Path) -> Dict[str, Path]:
+    """Lay out a Marker output directory with output, debug and image files."""
+    files = {
+        "markdown": root / "doc.md",
+        "image": root / "figure.PNG",
+        "hidden": root / ".hidden",
+        "partial": root / "part.tmp",
+        "debug": root / "debug_data" / "blocks.json",
+        "debug_image": root / "layout_images" / "page_0.png",
+        "nested": root / "assets" / "debug_data" / "note.txt",
+    }
+    for path in files.values():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"data")
+    return files
+
+
+def test_collect_all_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    files = _output_tree(tmp_path / "out")
+    output_files, debug_files, image_files = conversion_service.collect_all_files(str(tmp_path / "out"))
+    assert set(output_files) == {str(files[name]) for name in ("markdown", "image", "debug", "debug_image", "nested")}
+    # Only top-level debug directories count as debug output
+    assert set(debug_files) == {str(files["debug"]), str(files["debug_image"])}
+    assert set(image_files) == {str(files["image"]), str(files["debug_image"])}
+
+
+def test_collect_all_files_missing_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    assert conversion_service.collect_all_files(str(tmp_path / "missing")) == ([], [], [])
+
+
+def _zip_with_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, **kwargs: Any) -> zipfile.ZipFile:
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "out"
+    _output_tree(root)
+    result = _result("report.pdf", "# Report")
+    result.output_dir = str(root)
+    result.output_files, result.debug_files, result.image_files = conversion_service.collect_all_files(str(root))
+    failed = _result("broken.pdf", success=False)
+    buffer = io.BytesIO()
+    conversion_service.write_zip_from_results(buffer, [result, failed], **kwargs)
+    return zipfile.ZipFile(buffer)
+
+
+def test_zip_stores_compressed_formats(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    with _zip_with_files(tmp_path, monkeypatch) as zipf:
+        assert zipf.getinfo("01_report/output/figure.PNG").compress_type == zipfile.ZIP_STORED
+        assert zipf.getinfo("01_report/output/doc.md").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_write_zip_from_results_large_text(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "LARGE_TEXT_CHUNK", 4)
+    text = "tekst ✓ 文" * 3
+    buffer = io.BytesIO()
+    conversion_service.write_zip_from_results(buffer, [_result("a.pdf", text)], overview_content="")
+    with zipfile.ZipFile(buffer) as zipf:
+        assert zipf.read("01_a/converted_text.md").decode("utf-8") == text
+
+
+def test_write_zip_from_results_layout(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    with _zip_with_files(tmp_path, monkeypatch, overview_content="overview") as zipf:
+        names = set(zipf.namelist())
+        assert "01_report/converted_text.md" in names
+        assert "01_report/output/doc.md" in names
+        assert "01_report/debug/debug_data/blocks.json" in names
+        assert "01_report/images/figure.PNG" in names
+        assert not any(name.startswith("02_") for name in names)
+        assert zipf.read("00_OVERVIEW.md") == b"overview"
+        assert zipf.read("01_report/converted_text.md") == b"# Report"
+
+
+def test_write_zip_from_results_options(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    with _zip_with_files(tmp_path, monkeypatch, include_debug=False, include_images=False) as zipf:
+        names = zipf.namelist()
+        assert not any("/debug/" in name or "/images/" in name for name in names)
+        assert "Conversion Overview" in zipf.read("00_OVERVIEW.md").decode("utf-8")
+
+
+# --- Preview ---
+
+def test_build_combined_preview(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "PREVIEW_MAX_CHARS", 0)
+    results = [_result("a.pdf", "alpha"), _result("b.pdf", success=False), _result("c.pdf", "gamma")]
+    preview = conversion_service.build_combined_preview(results, "overview\n", "# Texts\n", "[cut]")
+    assert preview == "overview\n# Texts\n## 1. a.pdf\n\nalpha\n\n---\n\n## 3. c.pdf\n\ngamma\n\n---\n\n"
+
+
+def test_build_combined_preview_truncates(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "PREVIEW_MAX_CHARS", 8)
+    results = [_result("a.pdf", "alpha"), _result("b.pdf", "bravo"), _result("c.pdf", "charlie")]
+    preview = conversion_service.build_combined_preview(results, "", "", "[cut]")
+    assert preview == "## 1. a.pdf\n\nalpha\n\n---\n\n## 2. b.pdf\n\nbra[cut]"
+
+
+def test_build_combined_preview_cut_between_texts(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "PREVIEW_MAX_CHARS", 5)
+    results = [_result("a.pdf", "alpha"), _result("b.pdf", "bravo")]
+    preview = conversion_service.build_combined_preview(results, "", "", "[cut]")
+    assert preview.endswith("alpha\n\n---\n\n[cut]")
+    assert "b.pdf" not in preview
+
+
+# --- Output directories ---
+
+def test_make_output_dir_truncates_by_bytes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "get_temp_arena", lambda: str(tmp_path))
+    output_dir = conversion_service.make_output_dir("文" * 100 + ".pdf")
+    assert os.path.isdir(output_dir)
+    assert os.path.dirname(output_dir) == str(tmp_path)
+    # 64 bytes hold 21 whole three-byte characters; the split 22nd one is dropped
+    stem = "文" * (conversion_service.OUTPUT_DIR_NAME_BYTES // 3)
+    assert os.path.basename(output_dir).startswith(f"marker_output_{stem}_")
+    assert not os.path.basename(output_dir).startswith(f"marker_output_{stem}文")
+
+
+def test_make_output_dir_is_unique(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(conversion_service, "get_temp_arena", lambda: str(tmp_path))
+    first = conversion_service.make_output_dir("doc.pdf")
+    assert os.path.basename(first).startswith("marker_output_doc_")
+    assert conversion_service.make_output_dir("doc.pdf") != first
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
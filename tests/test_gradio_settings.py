@@ -0,0 +1,55 @@
+"""
+Tests voor de koppeling tussen de Gradio inputs en SETTINGS_KEYS.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import the Gradio app
+sys.path.append(str(Path(__file__).parent.parent))
+
+pytest.importorskip("gradio")
+
+import gradio_app_advanced_full as app
+
+
+def test_settings_keys_match_inputs() -> None:
+    """Elke Gradio input heeft precies één sleutel, in dezelfde volgorde."""
+    assert len(app.SETTINGS_KEYS) == len(app.settings_components)
+    assert len(set(app.SETTINGS_KEYS)) == len(app.SETTINGS_KEYS)
+
+
+def test_zip_settings_reach_their_keys() -> None:
+    """De ZIP checkboxes komen onder hun eigen sleutel terecht en verschuiven de debug instellingen niet."""
+    position = {key: i for i, key in enumerate(app.SETTINGS_KEYS)}
+    assert app.settings_components[position["include_images_in_zip"]] is app.include_images_in_zip
+    assert app.settings_components[position["include_debug_in_zip"]] is app.include_debug_in_zip
+    assert app.settings_components[position["debug_layout_images"]] is app.debug_layout_images
+    assert app.settings_components[position["debug_data_folder"]] is app.debug_data_folder
+
+
+def test_typed_settings_are_known_keys() -> None:
+    """Alle getypeerde en LLM instellingen bestaan in SETTINGS_KEYS."""
+    known = set(app.SETTINGS_KEYS)
+    assert set(app.TEXT_SETTINGS) <= known
+    assert set(app.NUMERIC_SETTINGS) <= known
+    assert set(app.BOOLEAN_SETTINGS) <= known
+    assert set(app.LLM_SPECIFIC_SETTINGS) <= known
+    for provider_keys in app.PROVIDER_SETTINGS.values():
+        assert set(provider_keys) <= known
+
+
+def test_normalize_settings_uses_input_values() -> None:
+    """De standaardwaarden van de inputs leveren de juiste ZIP en debug instellingen op."""
+    defaults = tuple(component.value for component in app.settings_components)
+    settings = app._normalize_settings(defaults)
+    assert settings["include_images_in_zip"] is bool(app.include_images_in_zip.value)
+    assert settings["include_debug_in_zip"] is bool(app.include_debug_in_zip.value)
+    assert settings["debug_layout_images"] is bool(app.debug_layout_images.value)
+    assert settings["pdftext_workers"] == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
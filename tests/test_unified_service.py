@@ -18,6 +18,7 @@ from conversion_service import (
     convert_pdf_bytes_to_markdown,
     convert_pdf_with_zip_output,
     convert_multiple_pdfs_with_zip,
+    ensure_models,
     get_converter_status,
     ConversionResult
 )
@@ -192,6 +193,12 @@ async def main() -> None:
     print("🚀 Unified Conversion Service Test Suite")
     print("=" * 50)
     
+    # Models load lazily; load them first so the status check is meaningful
+    try:
+        await ensure_models()
+    except RuntimeError as e:
+        print(f"❌ Model initialization failed: {e}")
+    
     # Test converter status
     status_ok = test_converter_status()
     if not status_ok:
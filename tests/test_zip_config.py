@@ -0,0 +1,112 @@
+"""
+Tests voor de Marker configuratie van de ZIP conversion service.
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+# Add parent directory to path to import conversion_service_zip
+sys.path.append(str(Path(__file__).parent.parent))
+
+import conversion_service
+import conversion_service_zip as zip_service
+
+
+def test_settings_groups_are_disjoint() -> None:
+    """Elke instelling hoort bij precies één groep, zodat ze maar één keer gezet wordt."""
+    assert not zip_service.BASIC_SETTINGS & zip_service.LLM_SETTINGS
+
+
+def test_blas_threads_follow_pipeline_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    """De CPU's worden verdeeld over MAX_CONCURRENCY van conversion_service, niet over een eigen standaard."""
+    expected = "1" if conversion_service.CUDA_DEVICE_PRESENT else str(
+        max(1, (os.cpu_count() or 1) // conversion_service.MAX_CONCURRENCY)
+    )
+    assert zip_service._BLAS_THREADS == expected
+    for name in conversion_service.BLAS_THREAD_VARS:
+        assert zip_service.THREAD_ENV[name] == expected
+
+
+def test_provider_defaults_cover_all_providers() -> None:
+    """Elke LLM provider heeft een eigen tabel met standaardwaarden."""
+    assert set(zip_service.PROVIDER_DEFAULTS) == set(zip_service.LLM_PROVIDERS)
+
+
+@pytest.mark.parametrize("provider, defaults", [
+    ("gemini", {"gemini_model_name": "gemini-2.0-flash"}),
+    ("openai", {"openai_model_name": "gpt-4o", "openai_base_url": None}),
+    ("anthropic", {"anthropic_model_name": "claude-3-5-sonnet-20241022"}),
+    ("azure", {"azure_endpoint": "", "azure_deployment": "", "azure_api_version": "2024-02-15-preview"}),
+    ("ollama", {"ollama_base_url": "http://localhost:11434", "ollama_model_name": "llama3.2:latest"}),
+    ("custom", {"custom_base_url": "", "custom_model_name": ""}),
+])
+def test_provider_settings_defaults(provider: str, defaults: Dict[str, Any]) -> None:
+    """Zonder instellingen levert elke provider dezelfde standaardwaarden als vóór de tabel."""
+    assert zip_service._provider_settings(provider, {}) == defaults
+
+
+def test_provider_settings_override_and_filter() -> None:
+    """Meegegeven waarden winnen; instellingen van andere providers vallen weg."""
+    settings = {"openai_model_name": "gpt-4o-mini", "gemini_model_name": "other", "temperature": 0.2}
+    assert zip_service._provider_settings("openai", settings) == {
+        "openai_model_name": "gpt-4o-mini",
+        "openai_base_url": None,
+    }
+
+
+@pytest.mark.parametrize("provider", ["gemini", "openai", "anthropic", "azure", "custom"])
+def test_provider_without_api_key_disables_llm(provider: str) -> None:
+    """Providers met een API key schakelen de LLM niet in zonder key."""
+    config = zip_service.build_direct_config({"llm_provider": provider}, "/out")
+    assert "use_llm" not in config
+    assert "llm_service" not in config
+
+
+def test_direct_config_with_provider() -> None:
+    """De provider configuratie komt samen met de geforceerde en basis instellingen in de config."""
+    settings = {
+        "llm_provider": "openai",
+        "openai_api_key": "sk-test",
+        "pdftext_workers": 4,
+        "force_ocr": True,
+        "temperature": 0.2,
+        "recognition_batch_size": 0,
+        "page_range": None,
+    }
+    config = zip_service.build_direct_config(settings, "/out")
+    assert config == {
+        "pdftext_workers": 1,
+        "disable_multiprocessing": True,
+        "output_dir": "/out",
+        "debug_data_folder": os.path.join("/out", "debug_data"),
+        "force_ocr": True,
+        "use_llm": True,
+        "llm_service": "marker.services.openai.OpenAIService",
+        "openai_api_key": "sk-test",
+        "openai_model_name": "gpt-4o",
+        "openai_base_url": None,
+        "temperature": 0.2,
+    }
+
+
+def test_direct_config_ollama_by_default() -> None:
+    """Zonder provider wordt Ollama gebruikt, met de setting naam die Marker verwacht."""
+    config = zip_service.build_direct_config({"ollama_model_name": "mistral"}, "/out")
+    assert config["llm_service"] == "marker.services.ollama.OllamaService"
+    assert config["ollama_model"] == "mistral"
+    assert config["ollama_base_url"] == "http://localhost:11434"
+    assert "ollama_model_name" not in config
+
+
+def test_direct_config_without_llm() -> None:
+    """Met use_llm uit blijft de LLM configuratie weg."""
+    config = zip_service.build_direct_config({"use_llm": False, "openai_api_key": "sk-test"}, "/out")
+    assert "llm_service" not in config
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,109 @@
+"""
+Tests voor de conversie pool en de batch conversie van de ZIP conversion service.
+
+Marker zelf wordt vervangen door een nep inference stap, zodat deze tests
+zonder modellen draaien.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+
+import pytest
+
+# Add parent directory to path to import conversion_service_zip
+sys.path.append(str(Path(__file__).parent.parent))
+
+import conversion_service
+import conversion_service_zip as zip_service
+from conversion_service import ConversionResult
+
+
+@pytest.fixture
+def inference_threads(monkeypatch: pytest.MonkeyPatch) -> Iterator[List[str]]:
+    """Vervang de Marker stappen en noteer op welke thread de inference draait."""
+    threads: List[str] = []
+
+    async def no_models() -> None:
+        return None
+
+    def run_inference(pdf_path: str, settings: dict, result: ConversionResult) -> Tuple[Any, str]:
+        threads.append(threading.current_thread().name)
+        return None, ""
+
+    def postprocess(result: ConversionResult, rendered_document: Any, temp_output_dir: str) -> ConversionResult:
+        result.success = True
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-marker")
+    monkeypatch.setattr(conversion_service, "_EXECUTOR", executor)
+    monkeypatch.setattr(zip_service, "ensure_models", no_models)
+    monkeypatch.setattr(zip_service, "_run_inference", run_inference)
+    monkeypatch.setattr(zip_service, "_postprocess", postprocess)
+    yield threads
+    executor.shutdown()
+
+
+def test_pool_size_follows_conversion_service() -> None:
+    """Eén MARKER_WORKERS instelling, met dezelfde standaard als conversion_service."""
+    assert zip_service.MAX_WORKERS == conversion_service.MAX_WORKERS
+
+
+def test_inference_runs_on_shared_pool(inference_threads: List[str]) -> None:
+    """De inference draait op de conversie pool van conversion_service."""
+    result = asyncio.run(zip_service.convert_pdf_with_zip_output("a.pdf", {}))
+    assert result.success
+    assert len(inference_threads) == 1
+    assert inference_threads[0].startswith("shared-marker")
+
+
+@pytest.fixture
+def fake_conversions(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Vervang de conversie per PDF; PDF's die met "broken" beginnen gooien een fout."""
+    converted: List[str] = []
+
+    async def convert(pdf_path: str, settings: dict) -> ConversionResult:
+        if os.path.basename(pdf_path).startswith("broken"):
+            raise RuntimeError("models not loaded")
+        converted.append(pdf_path)
+        result = ConversionResult(os.path.basename(pdf_path))
+        result.markdown_content = f"tekst van {result.pdf_name}"
+        result.success = True
+        return result
+
+    monkeypatch.setattr(zip_service, "convert_pdf_with_zip_output", convert)
+    monkeypatch.setattr(zip_service, "schedule_prefetch", lambda pdf_path: None)
+    return converted
+
+
+def test_batch_accepts_plain_paths(tmp_path: Path, fake_conversions: List[str]) -> None:
+    """Paden als str of Path (Gradio met type="filepath") worden gewoon geconverteerd."""
+    uploads: List[Any] = [str(tmp_path / "a.pdf"), tmp_path / "b.pdf"]
+    zip_path, combined = asyncio.run(zip_service.convert_multiple_pdfs_with_zip(uploads, {}))
+    try:
+        assert fake_conversions == [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")]
+        assert "tekst van a.pdf" in combined
+        assert "tekst van b.pdf" in combined
+    finally:
+        os.unlink(zip_path)
+
+
+def test_batch_failure_becomes_failed_result(tmp_path: Path, fake_conversions: List[str]) -> None:
+    """Een fout bij één pad wordt een mislukt resultaat in het overzicht; de rest gaat door."""
+    uploads: List[Any] = [str(tmp_path / "broken.pdf"), str(tmp_path / "ok.pdf")]
+    zip_path, combined = asyncio.run(zip_service.convert_multiple_pdfs_with_zip(uploads, {}))
+    try:
+        assert fake_conversions == [str(tmp_path / "ok.pdf")]
+        assert "## 1. broken.pdf" in combined
+        assert "models not loaded" in combined
+        assert "tekst van ok.pdf" in combined
+    finally:
+        os.unlink(zip_path)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))